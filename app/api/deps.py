@@ -1,21 +1,60 @@
-from app.auth.auth_handler import decode_jwt
-from app.config import settings
+from functools import lru_cache
+
+from fastapi import Depends, HTTPException, Request, status
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
+from app.auth.auth_bearer import JWTBearer
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.models.users import AuthUser
+
+
+principal_stats = {"from_token": 0, "from_cache": 0, "from_db": 0}
+
+
+@lru_cache(maxsize=None)
+def get_user_cache() -> TTLCache:
+    # email -> AuthUser, only consulted for tokens that do not carry the user's name
+    settings = get_settings()
+    return TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def get_mongo_client(request: Request) -> AsyncIOMotorClient:
+    return request.app.state.mongo_client
+
+
+async def get_mongo(request: Request) -> AsyncIOMotorDatabase:
+    return get_mongo_client(request)[get_settings().MONGO_DB]
+
+
+def invalidate_user(email: str):
+    """
+    Drop the cached principal, call it whenever a user's profile changes.
+    """
+    get_user_cache().delete(email)
 
-async def get_current_user(token):
-    decoded_token = decode_jwt(token)
-    mongo_db = await get_mongo()
-    user_id = await mongo_db.users.find_one({ "email": decoded_token["user_id"] })
-    return user_id["name"]
 
+async def get_current_user(
+    decoded_token: dict = Depends(JWTBearer()),
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+) -> AuthUser:
+    email = decoded_token["user_id"]
+    if decoded_token.get("name") is not None and decoded_token.get("uid") is not None:
+        principal_stats["from_token"] += 1
+        return AuthUser(user_id=decoded_token["uid"], name=decoded_token["name"])
 
-async def get_mongo() -> AsyncIOMotorDatabase:
-    ip = settings.MONGO_IP
-    port = settings.MONGO_PORT
-    username = settings.MONGO_USER
-    pwd = settings.MONGO_PWD
-    mongo_uri = "mongodb://" + str(ip) + ":" + str(port) + username + pwd
+    user = get_user_cache().get(email)
+    if user is not None:
+        principal_stats["from_cache"] += 1
+        return user
 
-    client = AsyncIOMotorClient(mongo_uri)
-    return client[settings.MONGO_DB]
+    principal_stats["from_db"] += 1
+    document = await mongo_db.users.find_one({ "email": email }, {"name": True})
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid token or expired token.",
+        )
+    user = AuthUser(user_id=str(document["_id"]), name=document["name"])
+    get_user_cache().set(email, user)
+    return user
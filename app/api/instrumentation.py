@@ -0,0 +1,103 @@
+import json
+import logging
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+from app.core.instrumentation import RequestStats, current_request_stats
+from app.core.metrics import registry
+
+
+logger = logging.getLogger("app.requests")
+
+_LABELS = ("method", "route")
+
+request_seconds = registry.histogram("http_request_duration_seconds", "Duration of HTTP requests.", _LABELS)
+request_mongo_seconds = registry.histogram(
+    "http_request_mongo_seconds", "Time spent in Mongo commands per HTTP request.", _LABELS,
+)
+request_round_trips = registry.histogram(
+    "http_request_mongo_round_trips", "Mongo commands per HTTP request.", _LABELS,
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50),
+)
+requests_total = registry.counter("http_requests_total", "HTTP requests by status.", _LABELS + ("status",))
+over_round_trip_budget = registry.counter(
+    "http_requests_over_round_trip_budget_total", "HTTP requests that issued more Mongo commands than the budget.", _LABELS,
+)
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> str:
+    return 'mongo;dur=%.2f;desc="%d round trips", app;dur=%.2f' % (
+        stats.mongo_seconds * 1000, stats.round_trips, elapsed * 1000,
+    )
+
+
+class InstrumentationMiddleware:
+    """
+    Collects the Mongo commands of every request, adds a `Server-Timing` header, logs one
+    JSON line per request and feeds the per-route metrics served on /metrics. Requests
+    issuing more than `max_round_trips` Mongo commands are logged as warnings.
+
+    `enabled` and `max_round_trips` default to the INSTRUMENTATION_ENABLED and
+    MAX_MONGO_ROUND_TRIPS settings, read on the first request.
+    """
+
+    def __init__(self, app: ASGIApp, enabled: Optional[bool] = None, max_round_trips: Optional[int] = None):
+        self.app = app
+        self.enabled = enabled
+        self.max_round_trips = max_round_trips
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self.enabled is None:
+            self.enabled = get_settings().INSTRUMENTATION_ENABLED
+        if self.max_round_trips is None:
+            self.max_round_trips = get_settings().MAX_MONGO_ROUND_TRIPS
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            self._record(scope, stats, status_code, time.perf_counter() - started)
+
+    def _record(self, scope: Scope, stats: RequestStats, status_code: int, elapsed: float):
+        # the matched route template, set on the scope by the router
+        route = scope.get("route")
+        labels = (scope["method"], route.path if route is not None else "unmatched")
+        request_seconds.observe(labels, elapsed)
+        request_mongo_seconds.observe(labels, stats.mongo_seconds)
+        request_round_trips.observe(labels, stats.round_trips)
+        requests_total.inc(labels + (str(status_code),))
+        line = {
+            "method": labels[0],
+            "route": labels[1],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "mongo_ms": round(stats.mongo_seconds * 1000, 2),
+            "mongo_round_trips": stats.round_trips,
+            "mongo_documents": stats.documents,
+            "mongo_commands": ["%s.%s" % (record.collection, record.command) for record in stats.commands],
+        }
+        if stats.round_trips > self.max_round_trips:
+            over_round_trip_budget.inc(labels)
+            logger.warning(json.dumps(line))
+        else:
+            logger.info(json.dumps(line))
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
 
-from app.api.routes import users, blogs
+from app.api.routes import users, blogs, bulk, export, health, metrics
 
 api_router = APIRouter()
 
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(blogs.router, prefix="/blogs", tags=["blogs"])
\ No newline at end of file
+# before the blogs router, so /blogs/export and /blogs/comments/bulk are not taken for blog ids
+api_router.include_router(export.router, prefix="/blogs", tags=["export"])
+api_router.include_router(bulk.router, prefix="/blogs", tags=["bulk"])
+api_router.include_router(blogs.router, prefix="/blogs", tags=["blogs"])
+api_router.include_router(health.router, prefix="/health", tags=["health"])
+api_router.include_router(metrics.router, tags=["metrics"])
\ No newline at end of file
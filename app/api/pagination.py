@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+
+# newest first, _id breaks ties between documents created in the same millisecond
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def _encode(payload: dict) -> str:
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, parse):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return parse(json.loads(base64.urlsafe_b64decode(padded.encode())))
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+
+
+def encode_cursor(created_at: datetime, _id: ObjectId) -> str:
+    """
+    Opaque cursor pointing right after the given document in KEYSET_SORT order.
+    """
+    return _encode({"t": created_at.isoformat(), "id": str(_id)})
+
+
+def decode_cursor(cursor: str):
+    return _decode(cursor, lambda payload: (datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])))
+
+
+def keyset_filter(cursor: str) -> dict:
+    """
+    Mongo filter selecting the documents that come after `cursor` in KEYSET_SORT order.
+    """
+    created_at, _id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": _id}},
+        ]
+    }
+
+
+def encode_score_cursor(score: float, _id) -> str:
+    """
+    Opaque cursor pointing right after the given search result, ranked by score then _id.
+    """
+    return _encode({"s": score, "id": str(_id)})
+
+
+def score_keyset_filter(cursor: str) -> dict:
+    """
+    Mongo filter on a `score` field selecting the results that come after `cursor`.
+    """
+    score, _id = _decode(cursor, lambda payload: (float(payload["s"]), ObjectId(payload["id"])))
+    return {
+        "$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "_id": {"$lt": _id}},
+        ]
+    }
@@ -0,0 +1,121 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.auth.auth_handler import verify_jwt
+from app.config import get_settings
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimitBackend
+
+
+class RateLimitRule(NamedTuple):
+    name: str
+    methods: frozenset
+    path: re.Pattern
+    rate: float
+    burst: int
+
+
+def get_rate_limit_rules() -> List[RateLimitRule]:
+    settings = get_settings()
+    return [
+        RateLimitRule(
+            "reactions",
+            frozenset({"POST", "DELETE"}),
+            re.compile(r"^/blogs/[0-9a-f]{24}/(likes|dislikes)$"),
+            settings.RATE_LIMIT_REACTIONS_PER_SECOND,
+            settings.RATE_LIMIT_REACTIONS_BURST,
+        ),
+        RateLimitRule(
+            "comments",
+            frozenset({"POST", "PUT", "DELETE"}),
+            re.compile(r"^/blogs/[0-9a-f]{24}/comments(/[0-9a-f]{24})?$"),
+            settings.RATE_LIMIT_COMMENTS_PER_SECOND,
+            settings.RATE_LIMIT_COMMENTS_BURST,
+        ),
+        RateLimitRule(
+            "bulk",
+            frozenset({"POST"}),
+            re.compile(r"^/blogs(/comments)?/bulk$"),
+            settings.RATE_LIMIT_BULK_PER_SECOND,
+            settings.RATE_LIMIT_BULK_BURST,
+        ),
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_rate_limit_backend() -> MemoryRateLimitBackend:
+    return MemoryRateLimitBackend(max_keys=get_settings().RATE_LIMIT_MAX_KEYS)
+
+# "<rule>:allowed" / "<rule>:limited" -> requests
+rate_limit_stats = Counter()
+
+
+def _identity(scope: Scope) -> str:
+    """
+    The user of a valid bearer token, the client address otherwise. Keying on the user
+    rather than the token keeps made-up or rotated tokens from getting fresh buckets.
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            # verified once per distinct token, the claims are cached
+            claims = verify_jwt(value[7:].decode("latin-1"))
+            user = claims and (claims.get("uid") or claims.get("user_id"))
+            if user:
+                return f"user:{user}"
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """
+    Token bucket rate limits on the write routes matched by `rules`, per user or client
+    address. Requests over the limit get a 429 with `Retry-After`.
+
+    Without explicit rules and backend the configured ones are used, resolved on the first
+    request so that building the app does not read the settings. With RATE_LIMIT_ENABLED
+    off no rule applies.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[Sequence[RateLimitRule]] = None,
+        backend: Optional[RateLimitBackend] = None,
+    ):
+        self.app = app
+        self.rules = rules
+        self.backend = backend
+
+    def _configure(self):
+        if self.rules is None:
+            self.rules = get_rate_limit_rules() if get_settings().RATE_LIMIT_ENABLED else []
+        if self.backend is None:
+            self.backend = get_rate_limit_backend()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            if self.rules is None or self.backend is None:
+                self._configure()
+            for rule in self.rules:
+                if scope["method"] in rule.methods and rule.path.match(scope["path"]):
+                    key = f"{rule.name}:{_identity(scope)}"
+                    allowed, retry_after = await self.backend.take(key, rule.rate, rule.burst)
+                    if not allowed:
+                        rate_limit_stats[f"{rule.name}:limited"] += 1
+                        response = JSONResponse(
+                            {"detail": "Too many requests, slow down."},
+                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(math.ceil(retry_after))},
+                        )
+                        await response(scope, receive, send)
+                        return
+                    rate_limit_stats[f"{rule.name}:allowed"] += 1
+                    break
+        await self.app(scope, receive, send)
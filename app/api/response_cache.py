@@ -0,0 +1,105 @@
+import hashlib
+from functools import lru_cache
+
+from bson import ObjectId
+from fastapi import Request, Response
+
+from app.api.responses import dumps
+from app.config import get_settings
+from app.core.cache import CacheBackend, MemoryCacheBackend, SingleFlight
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized JSON responses with ETags.
+
+    Blog detail responses are keyed by blog id and a generation of that blog, listings
+    embed a generation number that every blog write bumps, so a single increment
+    invalidates all cached listings. A build that started before an invalidation stores
+    its payload under the old generation, where no request looks anymore.
+    Per-author listings have a generation of their own, bumped by that author's blog
+    writes only, reactions and comments show up there once the TTL expires.
+
+    Concurrent misses of the same key share a single build, so a burst of identical
+    requests for a cold entry runs one Mongo query.
+    """
+
+    _LISTING_GENERATION = "blogs:generation"
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.not_modified = 0
+        self.flights = SingleFlight()
+
+    async def detail_key(self, blog_id) -> str:
+        generation = await self.backend.counter(f"blogs:detail:{blog_id}:generation")
+        return f"blogs:detail:{blog_id}:{generation}"
+
+    async def listing_key(self, **params) -> str:
+        generation = await self.backend.counter(self._LISTING_GENERATION)
+        query = "&".join(f"{name}={value}" for name, value in sorted(params.items()))
+        return f"blogs:list:{generation}:{query}"
+
+    async def author_key(self, author_id: str, **params) -> str:
+        generation = await self.backend.counter(f"blogs:author:{author_id}:generation")
+        query = "&".join(f"{name}={value}" for name, value in sorted(params.items()))
+        return f"blogs:author:{author_id}:{generation}:{query}"
+
+    async def invalidate_author(self, author_id: str):
+        await self.backend.incr(f"blogs:author:{author_id}:generation")
+
+    async def invalidate_blog(self, blog_id: ObjectId):
+        await self.backend.delete(await self.detail_key(blog_id))
+        await self.backend.incr(f"blogs:detail:{blog_id}:generation")
+        await self.backend.incr(self._LISTING_GENERATION)
+
+    async def invalidate_listings(self):
+        await self.backend.incr(self._LISTING_GENERATION)
+
+    async def respond(self, request: Request, key: str, build) -> Response:
+        """
+        Serve `key` from the cache, calling the `build` coroutine function to produce the payload on a miss.
+        """
+        cached = await self.backend.get(key) if self.enabled else None
+        if cached is not None:
+            etag, body = cached.split(b"\n", 1)
+            etag = etag.decode()
+        else:
+            etag, body = await self.flights.do(key, lambda: self._fill(key, build))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def _fill(self, key: str, build):
+        body = dumps(await build())
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        if self.enabled:
+            await self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+        return etag, body
+
+    def stats(self) -> dict:
+        return {**self.backend.stats(), "not_modified": self.not_modified, "single_flight": self.flights.stats()}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(
+        MemoryCacheBackend(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+        ),
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        enabled=settings.RESPONSE_CACHE_ENABLED,
+    )
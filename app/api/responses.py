@@ -0,0 +1,30 @@
+from enum import Enum
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def _bson_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    Serialize Mongo documents as they come from the driver, ObjectIds become strings.
+    """
+    return orjson.dumps(content, default=_bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class BSONResponse(ORJSONResponse):
+    """
+    JSON response that encodes ObjectId and datetime values directly, handlers can
+    return Mongo documents without copying ids to strings or running jsonable_encoder.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,13 +1,25 @@
+import html
+import re
 from datetime import datetime
 from typing import Annotated, Any
 from bson import ObjectId
 from fastapi import Path
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pymongo import ReturnDocument
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from app.api.deps import get_current_user, get_mongo
-from app.auth.auth_bearer import JWTBearer
-from app.models.blogs import AddCommentSchema, BlogDetailResponseSchema, BlogSchema, CreateBlogSchema, ReactionTypeEnum, UserReactionSchema
+from app.api.pagination import KEYSET_SORT, encode_cursor, encode_score_cursor, keyset_filter, score_keyset_filter
+from app.api.response_cache import get_response_cache
+from app.api.responses import BSONResponse
+from app.core.concurrency import gather
+from app.db.cascade import get_cascade_deleter
+from app.db.counter_buffer import get_counter_buffer, increment_counters
+from app.db.comment_previews import pull_comment_preview, push_comment_previews, update_comment_preview
+from app.db.counts import get_blog_counts
+from app.db.reactions import remove_reaction, set_reaction
+from app.db.trending import get_trending
+from app.models.blogs import AddCommentSchema, BLOG_DETAIL_FIELDS, BLOG_LIST_FIELDS, BlogDetailResponseSchema, BlogSchema, CreateBlogSchema, EXCERPT_LENGTH, ReactionTypeEnum, UserReactionSchema, make_excerpt
 from app.models.users import AuthUser
 
 
@@ -19,229 +31,476 @@ id_regex = r"^[0-9a-f]{24}$"
 @router.post("/")
 async def create_blog(
     blog: CreateBlogSchema,
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
     """
     Create new blog.
     """
-    # TODO: is it ok to not check token of being None
-    username = await get_current_user(token)
     insert_blog = BlogSchema(
         title=blog.title,
         content=blog.content,
-        created_by=username,
+        excerpt=make_excerpt(blog.content),
+        created_by=user.name,
+        author_id=user.user_id,
     )
     blog_dict = dict(insert_blog)
     await mongo_db.blogs.insert_one(blog_dict)
-    blog_dict["_id"] = str(blog_dict["_id"])
-    return blog_dict
+    get_blog_counts().incr(user.name, 1)
+    await get_response_cache().invalidate_listings()
+    await get_response_cache().invalidate_author(user.user_id)
+    return BSONResponse(blog_dict)
+
+
+async def _raise_not_owned(collection, document_id: ObjectId, missing: str, forbidden: str, forbidden_status: int):
+    """
+    A write filtered on the caller's author_id matched nothing, tell a missing document from someone else's.
+    """
+    document = await collection.find_one({"_id": document_id}, {"_id": True})
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=missing)
+    raise HTTPException(status_code=forbidden_status, detail=forbidden)
 
 
 @router.put("/{blog_id}")
 async def update_blog(
     blog: CreateBlogSchema,
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     blog_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
     blog_id = ObjectId(blog_id)
-    document = await mongo_db.blogs.find_one({"_id": blog_id})
-    if document is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Blog with given id does not exists!",
-        )
-    if username != document["created_by"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to update this blog",
-        )
-    mongo_db.blogs.update_one(
-        {"_id": blog_id}, 
+    document = await mongo_db.blogs.find_one_and_update(
+        {"_id": blog_id, "author_id": user.user_id},
         {
             "$set": {
                 "title": blog.title,
-                "content": blog.content
+                "content": blog.content,
+                "excerpt": make_excerpt(blog.content),
             }
-        }
+        },
+        return_document=ReturnDocument.AFTER,
     )
-    document["title"] = blog.title
-    document["content"] = blog.content
-    document["_id"] = str(document["_id"])
-    return document
+    if document is None:
+        await _raise_not_owned(
+            mongo_db.blogs, blog_id,
+            "Blog with given id does not exists!",
+            "You are not authorized to update this blog",
+            status.HTTP_403_FORBIDDEN,
+        )
+    await get_response_cache().invalidate_blog(blog_id)
+    await get_response_cache().invalidate_author(user.user_id)
+    return BSONResponse(document)
 
 
 @router.delete("/{blog_id}", status_code=204)
 async def delete_blog(
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     blog_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
     blog_id = ObjectId(blog_id)
-    document = await mongo_db.blogs.find_one({"_id": blog_id})
+    document = await mongo_db.blogs.find_one({"_id": blog_id}, {"author_id": True, "created_by": True})
     if document is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Blog with given id does not exists!")
+    # blogs written before author ids existed have none and belong to nobody
+    if document.get("author_id") != user.user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to delete this blog")
+    # the job is written first and deletes the blog as well, so a crash before the
+    # delete below still removes the blog, its comments and reactions
+    await get_cascade_deleter().enqueue(mongo_db, blog_id)
+    result = await mongo_db.blogs.delete_one({"_id": blog_id, "author_id": user.user_id})
+    if result.deleted_count:
+        get_blog_counts().incr(document.get("created_by"), -1)
+    await get_response_cache().invalidate_blog(blog_id)
+    await get_response_cache().invalidate_author(user.user_id)
+    get_trending().touch(blog_id)
+    return {"message": "document deleted successfully!"}
+
+
+def _selected_fields(fields: str, allowed) -> list:
+    if fields is None:
+        return list(allowed)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(selected) - set(allowed))
+    if unknown:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Blog with given id does not exists!",
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}",
         )
-    # BUG: compare email ids instead
-    if username != document["created_by"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to delete this blog",
+    return selected
+
+
+def _listing_projection(selected: list) -> dict:
+    """
+    $project stage producing the listing items exactly as they are returned, ids included.
+    """
+    projection = {"_id": {"$toString": "$_id"}, "created_at": True}
+    for field in selected:
+        if field == "excerpt":
+            # blogs written before excerpts existed fall back to a cut of the content
+            projection["excerpt"] = {"$ifNull": ["$excerpt", {"$substrCP": ["$content", 0, EXCERPT_LENGTH]}]}
+        else:
+            projection[field] = True
+    return projection
+
+
+async def _list_blogs(mongo_db, created_by, page, per_page, cursor, include_total, estimate_total, fields) -> dict:
+    filter_query = {}
+    if created_by is not None:
+        filter_query["created_by"] = created_by
+    find_query = filter_query
+    skip = 0
+    if cursor is not None:
+        find_query = {**filter_query, **keyset_filter(cursor)}
+    else:
+        skip = (page - 1) * per_page
+    pipeline = [
+        {"$match": find_query},
+        {"$sort": dict(KEYSET_SORT)},
+    ]
+    if skip:
+        pipeline.append({"$skip": skip})
+    pipeline += [
+        # one extra document tells whether there is a next page
+        {"$limit": per_page + 1},
+        {"$project": _listing_projection(_selected_fields(fields, BLOG_LIST_FIELDS))},
+    ]
+    db_cursor = mongo_db.blogs.aggregate(pipeline)
+    if include_total:
+        results, total_count = await gather(
+            lambda: db_cursor.to_list(length=per_page + 1),
+            lambda: get_blog_counts().get(mongo_db, created_by, estimated=estimate_total),
         )
-    await mongo_db.blogs.delete_one({"_id": blog_id})
-    await mongo_db.reactions.delete_many({"blog_id": blog_id})
-    await mongo_db.comments.delete_many({"blog_id": blog_id})
-    return {"message": "document deleted successfully!"}
+        total_pages = -(-total_count // per_page)
+    else:
+        results = await db_cursor.to_list(length=per_page + 1)
+        total_count = total_pages = None
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_cursor(results[-1]["created_at"], results[-1]["_id"])
+    for doc in results:
+        get_counter_buffer().apply_pending(doc, ObjectId(doc["_id"]))
+    pagination = {
+        "page": page if cursor is None else None,
+        "per_page": per_page,
+        "total_pages": total_pages,
+        "total_count": total_count,
+        "next_cursor": next_cursor,
+    }
+    return {
+        "data": results,
+        "pagination": pagination
+    }
 
 
 @router.get("/")
 async def get_blogs(
+    request: Request,
     created_by: str = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: str = None,
+    include_total: bool = True,
+    estimate_total: bool = False,
+    fields: str = None,
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    skip = (page - 1) * per_page
-    filter_query = {}
-    if created_by is not None:
-        filter_query["created_by"] = created_by
-    cursor = (
-        mongo_db.blogs.find(
-            filter_query,
-            {'content': False}
-        )
-        .sort({"created_at": -1})
-        .skip(skip)
-        .limit(per_page)
-    )
-    results = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        results.append(doc)
-    total_count = await mongo_db.blogs.count_documents(filter_query)
-    total_pages = (total_count // per_page) + int(total_count%per_page)
-    pagination = {"page": page, "per_page": per_page, "total_pages": total_pages, "total_count": total_count}
+    """
+    List blogs, newest first. Pass the returned `next_cursor` as `cursor` to get the
+    following page, `page` is still accepted but gets slower the deeper it goes.
+    Totals come from a cache, `estimate_total` uses collection metadata when it is
+    cold and `include_total=false` skips them. `fields` is a comma separated subset
+    of the blog fields, the full `content` is never part of a listing.
+    """
+    params = {
+        "created_by": created_by,
+        "page": page,
+        "per_page": per_page,
+        "cursor": cursor,
+        "include_total": include_total,
+        "estimate_total": estimate_total,
+        "fields": fields,
+    }
+    key = await get_response_cache().listing_key(**params)
+    return await get_response_cache().respond(request, key, lambda: _list_blogs(mongo_db, **params))
+
+
+async def list_author_blogs(mongo_db, author_id: str, per_page: int, cursor: str = None, fields: str = None) -> dict:
+    """
+    Blogs of one author, newest first, keyset paged on the author_id_created_at_id index.
+    """
+    find_query = {"author_id": author_id}
+    if cursor is not None:
+        find_query.update(keyset_filter(cursor))
+    pipeline = [
+        {"$match": find_query},
+        {"$sort": dict(KEYSET_SORT)},
+        {"$limit": per_page + 1},
+        {"$project": _listing_projection(_selected_fields(fields, BLOG_LIST_FIELDS))},
+    ]
+    results = await mongo_db.blogs.aggregate(pipeline).to_list(length=per_page + 1)
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_cursor(results[-1]["created_at"], results[-1]["_id"])
+    for doc in results:
+        get_counter_buffer().apply_pending(doc, ObjectId(doc["_id"]))
     return {
         "data": results,
-        "pagination": pagination
+        "pagination": {"per_page": per_page, "next_cursor": next_cursor},
     }
 
 
-@router.get("/{blog_id}", response_model=BlogDetailResponseSchema)
-async def get_blog_detail(
-    blog_id: str = Path(..., pattern=id_regex),
+def _search_terms(q: str) -> list:
+    """
+    Lowercased words and quoted phrases of a `$text` search, negated ones left out.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', q):
+        term = phrase or word
+        if not term.startswith("-"):
+            terms.append(term.lower())
+    return terms
+
+
+def _highlight(text: str, pattern) -> str:
+    """
+    Escape `text` and wrap the matches of `pattern` in <mark> tags. Terms are matched
+    on the raw text, a term like "amp" would otherwise match inside the entities.
+    """
+    if pattern is None:
+        return html.escape(text)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
+
+
+@router.get("/search")
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200),
+    created_by: str = None,
+    per_page: int = Query(10, ge=1, le=100),
+    cursor: str = None,
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    blog_id = ObjectId(blog_id)
-    document = await mongo_db.blogs.find_one({"_id": blog_id})
+    """
+    Full-text search over title and content, best matches first. Items carry the
+    listing fields plus `score` and `highlights`, pass `next_cursor` as `cursor` for
+    the following page.
+    """
+    terms = _search_terms(q)
+    match = {"$text": {"$search": q}}
+    if created_by is not None:
+        match["created_by"] = created_by
+    projection = _listing_projection(BLOG_LIST_FIELDS)
+    projection["score"] = True
+    if terms:
+        # a window of the content around the first term, cut on the server so the
+        # content itself never leaves Mongo
+        projection["snippet"] = {"$let": {
+            "vars": {"position": {"$indexOfCP": [{"$toLower": "$content"}, terms[0]]}},
+            "in": {"$cond": [
+                {"$gte": ["$$position", 0]},
+                {"$substrCP": ["$content", {"$max": [0, {"$subtract": ["$$position", 60]}]}, EXCERPT_LENGTH]},
+                projection["excerpt"],
+            ]},
+        }}
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if cursor is not None:
+        pipeline.append({"$match": score_keyset_filter(cursor)})
+    pipeline += [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": per_page + 1},
+        {"$project": projection},
+    ]
+    results = await mongo_db.blogs.aggregate(pipeline).to_list(length=per_page + 1)
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_score_cursor(results[-1]["score"], results[-1]["_id"])
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    for doc in results:
+        get_counter_buffer().apply_pending(doc, ObjectId(doc["_id"]))
+        snippet = doc.pop("snippet", doc.get("excerpt", ""))
+        doc["highlights"] = {
+            "title": _highlight(doc["title"], pattern),
+            "snippet": _highlight(snippet, pattern),
+        }
+    return BSONResponse({
+        "data": results,
+        "pagination": {"per_page": per_page, "next_cursor": next_cursor},
+    })
+
+
+@router.get("/trending")
+async def get_trending_blogs(
+    per_page: int = Query(10, ge=1, le=100),
+    cursor: str = None,
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Recent blogs ranked by likes, dislikes and comments decayed by age, read from
+    the materialized trending_blogs collection. Items carry the listing fields plus
+    `score`, pass `next_cursor` as `cursor` for the following page.
+    """
+    find_query = score_keyset_filter(cursor) if cursor is not None else {}
+    ranked = await (
+        mongo_db.trending_blogs.find(find_query, {"score": True})
+        .sort([("score", -1), ("_id", -1)])
+        .limit(per_page + 1)
+        .to_list(length=per_page + 1)
+    )
+    next_cursor = None
+    if len(ranked) > per_page:
+        ranked = ranked[:per_page]
+        next_cursor = encode_score_cursor(ranked[-1]["score"], ranked[-1]["_id"])
+    pipeline = [
+        {"$match": {"_id": {"$in": [entry["_id"] for entry in ranked]}}},
+        {"$project": _listing_projection(BLOG_LIST_FIELDS)},
+    ]
+    blogs = {blog["_id"]: blog async for blog in mongo_db.blogs.aggregate(pipeline)}
+    results = []
+    for entry in ranked:
+        # blogs deleted since the last refresh are skipped
+        doc = blogs.get(str(entry["_id"]))
+        if doc is not None:
+            get_counter_buffer().apply_pending(doc, entry["_id"])
+            doc["score"] = entry["score"]
+            results.append(doc)
+    return BSONResponse({
+        "data": results,
+        "pagination": {"per_page": per_page, "next_cursor": next_cursor},
+    })
+
+
+async def _blog_detail(mongo_db, blog_id: ObjectId, projection: dict = None) -> dict:
+    document = await mongo_db.blogs.find_one({"_id": blog_id}, projection)
     if document is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Blog with given id does not exists!",
         )
-    document["_id"] = str(document["_id"])
+    get_counter_buffer().apply_pending(document)
     return document
 
 
+@router.get("/{blog_id}", response_model=BlogDetailResponseSchema)
+async def get_blog_detail(
+    request: Request,
+    blog_id: str = Path(..., pattern=id_regex),
+    fields: str = None,
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Blog detail, supports `If-None-Match` with the returned `ETag`. `fields` is a
+    comma separated subset of the blog fields, only full documents are cached.
+    """
+    blog_id = ObjectId(blog_id)
+    if fields is not None:
+        projection = {field: True for field in _selected_fields(fields, BLOG_DETAIL_FIELDS)}
+        return BSONResponse(await _blog_detail(mongo_db, blog_id, projection))
+    key = await get_response_cache().detail_key(blog_id)
+    return await get_response_cache().respond(request, key, lambda: _blog_detail(mongo_db, blog_id))
+
+
 @router.post("/{blog_id}/comments")
 async def add_comment(
     data: AddCommentSchema,
     blog_id: str = Path(..., pattern=id_regex),
-    token: Annotated[str, Depends(JWTBearer())] = None,
+    user: Annotated[AuthUser, Depends(get_current_user)] = None,
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
     blog_id = ObjectId(blog_id)
+    user_comment = {
+        # set here so the preview can be pushed without waiting for the insert
+        "_id": ObjectId(),
+        "user_id": user.name,
+        "author_id": user.user_id,
+        "blog_id": blog_id,
+        "comment": data.comment,
+        "created_at": datetime.now()
+    }
     blog = await mongo_db.blogs.find_one({"_id": blog_id}, {"_id": True})
     if blog is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Blog with given id does not exists!",
         )
-    user_comment = {
-        "user_id": username,
-        "blog_id": blog_id,
-        "comment": data.comment,
-        "created_at": datetime.now()
-    }
-    await mongo_db.blogs.update_one(
-        {"_id": blog_id},
-        {"$inc": {"comments": 1}}
+    await gather(
+        lambda: mongo_db.comments.insert_one(user_comment),
+        lambda: increment_counters(mongo_db.blogs, blog_id, {"comments": 1}),
+        lambda: push_comment_previews(mongo_db.blogs, blog_id, [user_comment]),
     )
-    await mongo_db.comments.insert_one(user_comment)
-    user_comment["_id"] = str(user_comment["_id"])
-    user_comment["blog_id"] = str(user_comment["blog_id"])
-    user_comment["user_id"] = str(user_comment["user_id"])
-    return user_comment
+    await get_response_cache().invalidate_blog(blog_id)
+    get_trending().touch(blog_id)
+    return BSONResponse(user_comment)
 
 
 @router.delete("/{blog_id}/comments/{comment_id}", status_code=204)
 async def delete_comment(
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     blog_id: str = Path(..., pattern=id_regex),
     comment_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
     comment_id = ObjectId(comment_id)
-    user_comment = await mongo_db.comments.find_one({"_id": comment_id})
+    user_comment = await mongo_db.comments.find_one_and_delete(
+        {"_id": comment_id, "author_id": user.user_id},
+        {"blog_id": True},
+    )
     if user_comment is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No such comment.",
-        )
-    # BUG: compare email ids instead
-    if user_comment["user_id"] != username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You are not authorized to delete this comment",
+        await _raise_not_owned(
+            mongo_db.comments, comment_id,
+            "No such comment.",
+            "You are not authorized to delete this comment",
+            status.HTTP_400_BAD_REQUEST,
         )
-    await mongo_db.blogs.update_one(
-        {"_id": blog_id},
-        {"$inc": {"comments": -1}}
+    await gather(
+        lambda: increment_counters(mongo_db.blogs, user_comment["blog_id"], {"comments": -1}),
+        lambda: pull_comment_preview(mongo_db.blogs, user_comment["blog_id"], comment_id),
     )
-    await mongo_db.comments.delete_one({"_id": comment_id})
+    await get_response_cache().invalidate_blog(user_comment["blog_id"])
+    get_trending().touch(user_comment["blog_id"])
     return {"message": "comment deleted successfully"}
 
 
 @router.put("/{blog_id}/comments/{comment_id}")
 async def update_comment(
     data: AddCommentSchema,
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     comment_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
     comment_id = ObjectId(comment_id)
-    user_comment = await mongo_db.comments.find_one({"_id": comment_id})
-    if user_comment is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No such comment.",
-        )
-    # BUG: compare emails ids instead
-    if user_comment["user_id"] != username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You cannot update this comment.",
-        )
-    await mongo_db.comments.update_one(
-        {"_id": comment_id}, 
+    user_comment = await mongo_db.comments.find_one_and_update(
+        {"_id": comment_id, "author_id": user.user_id},
         {
             "$set": {
                 "comment": data.comment
             }
-        }
+        },
+        return_document=ReturnDocument.AFTER,
     )
-    user_comment["_id"] = str(user_comment["_id"])
-    user_comment["user_id"] = str(user_comment["user_id"])
-    user_comment["blog_id"] = str(user_comment["blog_id"])
-    return user_comment
+    if user_comment is None:
+        await _raise_not_owned(
+            mongo_db.comments, comment_id,
+            "No such comment.",
+            "You cannot update this comment.",
+            status.HTTP_400_BAD_REQUEST,
+        )
+    await update_comment_preview(mongo_db.blogs, user_comment["blog_id"], comment_id, data.comment)
+    await get_response_cache().invalidate_blog(user_comment["blog_id"])
+    return BSONResponse(user_comment)
 
 
 @router.get("/{blog_id}/comments")
@@ -249,86 +508,68 @@ async def get_blog_comments(
     blog_id: str = Path(..., pattern=id_regex),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: str = None,
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
+    """
+    Comments of a blog, newest first. When there are more, the `X-Next-Cursor`
+    response header holds the `cursor` of the following page.
+    """
     blog_id = ObjectId(blog_id)
-    blog = await mongo_db.blogs.find_one({"_id": blog_id}, {"_id": True})
-    if blog is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Blog with given id does not exists!",
-        )
-    skip = (page - 1) * per_page
-    cursor = (
-        mongo_db.comments.find()
-        .sort({"created_at": -1})
+    find_query = {"blog_id": blog_id}
+    skip = 0
+    if cursor is not None:
+        find_query.update(keyset_filter(cursor))
+    else:
+        skip = (page - 1) * per_page
+    db_cursor = (
+        mongo_db.comments.find(find_query)
+        .sort(KEYSET_SORT)
         .skip(skip)
-        .limit(per_page)
+        .limit(per_page + 1)
     )
-    all_comments = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"]);
-        doc["user_id"] = str(doc["user_id"])
-        doc["blog_id"] = str(doc["blog_id"])
-        all_comments.append(doc)
-    return all_comments
+    all_comments = await db_cursor.to_list(length=per_page + 1)
+    if not all_comments:
+        # only an empty page needs to tell a missing blog from a blog without comments
+        blog = await mongo_db.blogs.find_one({"_id": blog_id}, {"_id": True})
+        if blog is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Blog with given id does not exists!",
+            )
+    headers = {}
+    if len(all_comments) > per_page:
+        all_comments = all_comments[:per_page]
+        headers["X-Next-Cursor"] = encode_cursor(all_comments[-1]["created_at"], all_comments[-1]["_id"])
+    return BSONResponse(all_comments, headers=headers)
 
 
 @router.post("/{blog_id}/{reaction_type}", response_model=UserReactionSchema)
 async def reaction(
     reaction_type: ReactionTypeEnum,
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     blog_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = await get_current_user(token)
+    """
+    React to a blog, an existing opposite reaction is switched.
+    """
     blog_id = ObjectId(blog_id)
-    blog = await mongo_db.blogs.find_one({"_id": blog_id}, {"_id": True})
-    if blog is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Blog with given id does not exists!",
-        )
-    user_reaction = await mongo_db.user_reactions.find_one({"blog_id": blog_id, "user_id": username})
-    if user_reaction is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already reacted. Please undo reaction and try again.",
-        )
-    user_reaction = {
-        "user_id": username,
-        "blog_id": blog_id,
-        "reaction_type": reaction_type,
-    }
-    await mongo_db.user_reactions.insert_one(user_reaction)
-    await mongo_db.blogs.update_one(
-        {"_id": blog_id},
-        {"$inc": {reaction_type: 1}}
-    )
-    user_reaction["user_id"] = str(user_reaction["user_id"])
-    user_reaction["blog_id"] = str(user_reaction["blog_id"])
-    return user_reaction
+    user_reaction = await set_reaction(mongo_db, blog_id, user.user_id, user.name, reaction_type.value)
+    await get_response_cache().invalidate_blog(blog_id)
+    get_trending().touch(blog_id)
+    return BSONResponse(user_reaction)
 
 
 @router.delete("/{blog_id}/{reaction_type}", status_code=204)
 async def undo_reaction(
     reaction_type: ReactionTypeEnum,
-    token: Annotated[str, Depends(JWTBearer())],
+    user: Annotated[AuthUser, Depends(get_current_user)],
     blog_id: str = Path(..., pattern=id_regex),
     mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
 ):
-    username = get_current_user(token)
     blog_id = ObjectId(blog_id)
-    user_reaction = await mongo_db.user_reactions.find_one({"blog_id": blog_id, "user_id": username, "reaction_type": reaction_type})
-    if user_reaction is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have not reacted yet.",
-        )
-    
-    await mongo_db.user_reactions.delete_one({"_id": user_reaction["_id"]})
-    await mongo_db.blogs.update_one(
-        {"_id": blog_id},
-        {"$inc": {reaction_type: -1}}
-    )
-    return {"message": "You have undone the reaction!"}
\ No newline at end of file
+    await remove_reaction(mongo_db, blog_id, user.user_id, reaction_type.value)
+    await get_response_cache().invalidate_blog(blog_id)
+    get_trending().touch(blog_id)
+    return {"message": "You have undone the reaction!"}
@@ -0,0 +1,183 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Annotated, List, Tuple
+
+import orjson
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.api.deps import get_current_user, get_mongo
+from app.api.response_cache import get_response_cache
+from app.api.responses import BSONResponse
+from app.config import get_settings
+from app.db.comment_previews import push_comment_previews_many
+from app.db.counter_buffer import increment_counters_many
+from app.db.counts import get_blog_counts
+from app.db.trending import get_trending
+from app.models.blogs import BlogSchema, BulkCommentSchema, CreateBlogSchema, make_excerpt
+from app.models.users import AuthUser
+
+
+router = APIRouter()
+
+
+async def _read_items(request: Request) -> list:
+    """
+    Accept either a JSON array or NDJSON (one object per line) request body.
+    """
+    settings = get_settings()
+    max_bytes = settings.BULK_MAX_ITEMS * settings.BULK_MAX_ITEM_BYTES
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"At most {max_bytes} bytes per request.",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    # the length header is optional, chunked bodies are counted as they arrive
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            items = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON.",
+        )
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON.",
+        )
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_MAX_ITEMS} items per request.",
+        )
+    return items
+
+
+def _validate(items: list, schema) -> Tuple[List[Tuple[int, BaseModel]], list]:
+    valid, results = [], [None] * len(items)
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            results[index] = {
+                "index": index,
+                "status": "error",
+                "detail": ["%s: %s" % (".".join(map(str, error["loc"])), error["msg"]) for error in exc.errors()],
+            }
+    return valid, results
+
+
+async def _insert_many(collection, indexed_documents: list, results: list) -> list:
+    """
+    Unordered insert_many, recording a result per item, returns the indexes that were written.
+    """
+    if not indexed_documents:
+        return []
+    failed = {}
+    try:
+        await collection.insert_many([document for _, document in indexed_documents], ordered=False)
+    except BulkWriteError as exc:
+        failed = {error["index"]: error["errmsg"] for error in exc.details["writeErrors"]}
+    written = []
+    for position, (index, document) in enumerate(indexed_documents):
+        if position in failed:
+            results[index] = {"index": index, "status": "error", "detail": [failed[position]]}
+        else:
+            results[index] = {"index": index, "status": "created", "_id": document["_id"]}
+            written.append(index)
+    return written
+
+
+def _summary(results: list) -> dict:
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@router.post("/bulk")
+async def bulk_create_blogs(
+    request: Request,
+    user: Annotated[AuthUser, Depends(get_current_user)],
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Create many blogs at once from a JSON array or NDJSON of `{"title", "content"}`
+    objects, returns a result per item.
+    """
+    items = await _read_items(request)
+    valid, results = _validate(items, CreateBlogSchema)
+    documents = [
+        (index, dict(BlogSchema(
+            title=blog.title,
+            content=blog.content,
+            excerpt=make_excerpt(blog.content),
+            created_by=user.name,
+            author_id=user.user_id,
+        )))
+        for index, blog in valid
+    ]
+    written = await _insert_many(mongo_db.blogs, documents, results)
+    if written:
+        get_blog_counts().incr(user.name, len(written))
+        await get_response_cache().invalidate_listings()
+        await get_response_cache().invalidate_author(user.user_id)
+    return BSONResponse(_summary(results))
+
+
+@router.post("/comments/bulk")
+async def bulk_add_comments(
+    request: Request,
+    user: Annotated[AuthUser, Depends(get_current_user)],
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Add many comments at once from a JSON array or NDJSON of `{"blog_id", "comment"}`
+    objects, returns a result per item.
+    """
+    items = await _read_items(request)
+    valid, results = _validate(items, BulkCommentSchema)
+    blog_ids = {ObjectId(comment.blog_id) for _, comment in valid}
+    existing = {
+        blog["_id"]
+        async for blog in mongo_db.blogs.find({"_id": {"$in": list(blog_ids)}}, {"_id": True})
+    }
+    now = datetime.now()
+    documents = []
+    for index, comment in valid:
+        blog_id = ObjectId(comment.blog_id)
+        if blog_id not in existing:
+            results[index] = {"index": index, "status": "error", "detail": ["Blog with given id does not exists!"]}
+            continue
+        documents.append((index, {
+            "user_id": user.name,
+            "author_id": user.user_id,
+            "blog_id": blog_id,
+            "comment": comment.comment,
+            "created_at": now,
+        }))
+    written = set(await _insert_many(mongo_db.comments, documents, results))
+    per_blog = defaultdict(list)
+    for index, document in documents:
+        if index in written:
+            per_blog[document["blog_id"]].append(document)
+    await increment_counters_many(
+        mongo_db.blogs,
+        {blog_id: {"comments": len(comments)} for blog_id, comments in per_blog.items()},
+    )
+    await push_comment_previews_many(mongo_db.blogs, per_blog)
+    for blog_id in per_blog:
+        await get_response_cache().invalidate_blog(blog_id)
+        get_trending().touch(blog_id)
+    return BSONResponse(_summary(results))
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import AsyncIterator
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Path
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCursor, AsyncIOMotorDatabase
+
+from app.api.deps import get_mongo
+from app.api.responses import dumps
+from app.api.routes.blogs import id_regex
+from app.config import get_settings
+
+
+router = APIRouter()
+
+# oldest first so an incremental sync can continue from the last `created_at` it saw
+EXPORT_SORT = [("created_at", 1), ("_id", 1)]
+
+
+async def _ndjson(cursor: AsyncIOMotorCursor) -> AsyncIterator[bytes]:
+    """
+    Encode documents one per line, yielding one chunk per driver batch so memory stays constant.
+    """
+    try:
+        lines = []
+        async for document in cursor:
+            lines.append(dumps(document))
+            if len(lines) >= get_settings().EXPORT_BATCH_SIZE:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+    finally:
+        await cursor.close()
+
+
+def _since_filter(since: datetime = None) -> dict:
+    return {} if since is None else {"created_at": {"$gte": since}}
+
+
+@router.get("/export")
+async def export_blogs(
+    since: datetime = None,
+    created_by: str = None,
+    include_content: bool = True,
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Stream all blogs as NDJSON, oldest first. `since` is inclusive, so consumers
+    syncing incrementally should de-duplicate on `_id`.
+    """
+    filter_query = _since_filter(since)
+    if created_by is not None:
+        filter_query["created_by"] = created_by
+    projection = None if include_content else {"content": False}
+    cursor = (
+        mongo_db.blogs.find(filter_query, projection)
+        .sort(EXPORT_SORT)
+        .batch_size(get_settings().EXPORT_BATCH_SIZE)
+    )
+    return StreamingResponse(_ndjson(cursor), media_type="application/x-ndjson")
+
+
+@router.get("/{blog_id}/comments/export")
+async def export_blog_comments(
+    blog_id: str = Path(..., pattern=id_regex),
+    since: datetime = None,
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Stream the comments of a blog as NDJSON, oldest first.
+    """
+    filter_query = {"blog_id": ObjectId(blog_id), **_since_filter(since)}
+    cursor = (
+        mongo_db.comments.find(filter_query)
+        .sort(EXPORT_SORT)
+        .batch_size(get_settings().EXPORT_BATCH_SIZE)
+    )
+    return StreamingResponse(_ndjson(cursor), media_type="application/x-ndjson")
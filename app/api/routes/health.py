@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.api.deps import get_mongo_client, get_user_cache, principal_stats
+from app.api.rate_limit import rate_limit_stats
+from app.api.response_cache import get_response_cache
+from app.config import get_settings
+from app.db.cascade import get_cascade_deleter
+from app.db.counter_buffer import get_counter_buffer
+from app.db.counts import get_blog_counts
+from app.db.trending import get_trending
+
+
+router = APIRouter()
+
+
+@router.get("/")
+async def health(
+    request: Request,
+    mongo_client: AsyncIOMotorClient = Depends(get_mongo_client),
+):
+    """
+    Ping mongo and report connection pool usage of this process.
+    """
+    try:
+        await mongo_client.admin.command("ping")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database is not reachable.",
+        )
+    settings = get_settings()
+    return {
+        "status": "ok",
+        "mongo": {
+            "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+            "read_preference": settings.MONGO_READ_PREFERENCE,
+            "pools": request.app.state.mongo_pool_stats.snapshot(),
+        },
+        "principals": {
+            "resolved": dict(principal_stats),
+            "user_cache": get_user_cache().stats(),
+        },
+        "blog_counts": get_blog_counts().stats(),
+        "counter_buffer": get_counter_buffer().stats(),
+        "response_cache": get_response_cache().stats(),
+        "trending": get_trending().stats(),
+        "cascade_deletes": get_cascade_deleter().stats(),
+        "rate_limit": dict(rate_limit_stats),
+        "startup": request.app.state.startup,
+    }
@@ -1,16 +1,26 @@
 from fastapi import FastAPI, Body
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pymongo.errors import DuplicateKeyError
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
 
-from app.api.deps import get_mongo
+from app.api.deps import get_mongo, invalidate_user
+from app.api.response_cache import get_response_cache
+from app.api.routes.blogs import id_regex, list_author_blogs
 from app.auth.auth_handler import sign_jwt
 from app.models.users import UserSchema, UserLoginSchema
-from app.auth.hashing import get_password_hash
+from app.auth.hashing import check_password, hash_password
 
 
 router = APIRouter()
 
 
+def _user_exists():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="User already exists!",
+    )
+
+
 @router.post("/user/signup", tags=["users"])
 async def create_user(
     user: UserSchema,
@@ -18,17 +28,19 @@ async def create_user(
 ):
     user_exists = await mongo_db.users.find_one({ "email": user.email })
     if user_exists:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User already exists!",
-        )
-    user.password = get_password_hash(user.password)
-    mongo_db.users.insert_one({
-        "name": user.name,
-        "email": user.email,
-        "password": user.password
-    })
-    return sign_jwt(user.email)
+        raise _user_exists()
+    user.password = await hash_password(user.password)
+    try:
+        result = await mongo_db.users.insert_one({
+            "name": user.name,
+            "email": user.email,
+            "password": user.password
+        })
+    except DuplicateKeyError:
+        # a concurrent signup with the same email got past the check first
+        raise _user_exists()
+    invalidate_user(user.email)
+    return sign_jwt(user.email, user.name, str(result.inserted_id))
 
 
 @router.post("/user/login", tags=["users"])
@@ -39,8 +51,37 @@ async def user_login(
     # check if the user is registered
     is_registered = await mongo_db.users.find_one({ "email": user.email })
     if is_registered:
-        return sign_jwt(user.email)
+        is_valid, new_hash = await check_password(user.password, is_registered["password"])
+        if is_valid:
+            if new_hash is not None:
+                # stored hash uses outdated settings, e.g. fewer bcrypt rounds
+                await mongo_db.users.update_one(
+                    {"_id": is_registered["_id"]},
+                    {"$set": {"password": new_hash}}
+                )
+            return sign_jwt(user.email, is_registered["name"], str(is_registered["_id"]))
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Incorrect email/password"
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/{author_id}/blogs", tags=["users"])
+async def get_author_blogs(
+    request: Request,
+    author_id: str = Path(..., pattern=id_regex),
+    per_page: int = Query(10, ge=1, le=100),
+    cursor: str = None,
+    fields: str = None,
+    mongo_db: AsyncIOMotorDatabase = Depends(get_mongo),
+):
+    """
+    Blogs of one author, newest first, pass `next_cursor` as `cursor` for the
+    following page. The first page is cached per author until they write a blog.
+    """
+    if cursor is not None:
+        return await list_author_blogs(mongo_db, author_id, per_page, cursor, fields)
+    key = await get_response_cache().author_key(author_id, per_page=per_page, fields=fields)
+    return await get_response_cache().respond(
+        request, key, lambda: list_author_blogs(mongo_db, author_id, per_page, None, fields)
+    )
@@ -1,14 +1,18 @@
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .auth_handler import decode_jwt
+from .auth_handler import verify_jwt
 
 
 class JWTBearer(HTTPBearer):
+    """
+    Resolves to the verified token claims, which are also kept on `request.state.jwt_claims`.
+    """
+
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
     
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> dict:
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
             if credentials.scheme != "Bearer":
@@ -16,27 +20,16 @@ class JWTBearer(HTTPBearer):
                     status_code=403,
                     detail="Invalid authentication scheme."
                 )
-            if not self.verify_jwt(credentials.credentials):
+            claims = verify_jwt(credentials.credentials)
+            if claims is None:
                 raise HTTPException(
                     status_code=403,
                     detail="Invalid token or expired token."
                 )
-            return credentials.credentials
+            request.state.jwt_claims = claims
+            return claims
         else:
             raise HTTPException(
                 status_code=403,
                 detail="Invalid authrization code."
             )
-        
-    def verify_jwt(self, jwtoken: str) -> bool:
-        is_token_valid: bool = False
-
-        try:
-            payload = decode_jwt(jwtoken)
-        except:
-            payload = None
-            pass
-        
-        if payload:
-            is_token_valid = True
-        return is_token_valid
\ No newline at end of file
@@ -1,24 +1,40 @@
+import hashlib
 import time
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Optional
 
 import jwt
 from decouple import config
 
+from app.config import get_settings
+from app.core.cache import TTLCache
+
 # JWT_SECRET = config("JWT_SECRET")
 # JWT_ALGORITHM = config("JWT_ALGORITHM")
 
 
+@lru_cache(maxsize=None)
+def get_token_cache() -> TTLCache:
+    # sha256(token) -> verified claims, entries never outlive the token's "expires" claim
+    settings = get_settings()
+    return TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+
 def token_response(token: str):
     return {
         "access_token": token
     }
 
 
-def sign_jwt(user_id: str) -> Dict[str, str]:
+def sign_jwt(user_id: str, name: str = None, uid: str = None) -> Dict[str, str]:
     payload = {
         "user_id": user_id,
         "expires": time.time() + 600,
     }
+    if name is not None and uid is not None:
+        # lets get_current_user resolve the caller without a database lookup
+        payload["name"] = name
+        payload["uid"] = uid
     token = jwt.encode(payload, "secret", algorithm="HS256")
 
     return token_response(token)
@@ -28,4 +44,29 @@ def decode_jwt(token: str) -> dict:
         decode_token = jwt.decode(token, "secret", algorithms=["HS256"])
         return decode_token if decode_token["expires"] >= time.time() else None
     except:
-        raise jwt.exceptions.DecodeError("Problem decoding the token")
\ No newline at end of file
+        raise jwt.exceptions.DecodeError("Problem decoding the token")
+
+
+def verify_jwt(token: str) -> Optional[dict]:
+    """
+    Return the claims of a valid, unexpired token or None, verifying each distinct token only once.
+    """
+    cache = get_token_cache()
+    digest = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    claims = cache.get(digest)
+    if claims is not None:
+        if claims["expires"] >= now:
+            return claims
+        cache.delete(digest)
+        return None
+
+    try:
+        claims = jwt.decode(token, "secret", algorithms=["HS256"])
+    except jwt.exceptions.PyJWTError:
+        return None
+    expires = claims.get("expires")
+    if not isinstance(expires, (int, float)) or expires < now:
+        return None
+    cache.set(digest, claims, ttl=min(cache.ttl, expires - now))
+    return claims
@@ -1,10 +1,90 @@
-from passlib.context import CryptContext
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
 
-context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException, status
+
+from app.config import get_settings
+
+
+@lru_cache(maxsize=None)
+def get_context():
+    # passlib and bcrypt are imported on the first hash, not when the app starts
+    from passlib.context import CryptContext
+
+    rounds = get_settings().BCRYPT_ROUNDS
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        # hashes made with fewer rounds are reported for rehashing on login
+        bcrypt__min_rounds=rounds,
+    )
+
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight = 0
 
 
 def verify_password(plain_password, hashed_password):
-    return context.verify(plain_password, hashed_password)
+    return get_context().verify(plain_password, hashed_password)
     
 def get_password_hash(password):
-    return context.hash(password)
\ No newline at end of file
+    return get_context().hash(password)
+
+
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password, also returning a new hash when the stored one uses outdated settings.
+    """
+    return get_context().verify_and_update(plain_password, hashed_password)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().HASHING_MAX_WORKERS,
+            thread_name_prefix="password-hashing",
+        )
+    return _executor
+
+
+async def _run_in_pool(func, *args):
+    global _in_flight
+    settings = get_settings()
+    if _in_flight >= settings.HASHING_MAX_WORKERS + settings.HASHING_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_in_pool(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_in_pool(verify_and_update_password, plain_password, hashed_password)
+
+
+def warm_up_hashing():
+    """
+    Build the hashing context on the pool in the background, so the first login does not wait for it.
+    """
+    _get_executor().submit(get_context)
+
+
+def shutdown_hashing_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -1,4 +1,7 @@
 import os
+from functools import lru_cache
+from urllib.parse import quote_plus
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,8 +11,118 @@ class Settings(BaseSettings):
     MONGO_USER: str
     MONGO_PWD: str
 
+    # connection pool of the process-wide mongo client
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 60000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 10000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_READ_PREFERENCE: str = "primary"
+    # create declared indexes at startup, see app/db/indexes.py
+    MONGO_ENSURE_INDEXES: bool = True
+    # wrap multi-document writes (reactions) in transactions, needs a replica set
+    MONGO_USE_TRANSACTIONS: bool = False
+    # when set, `python -m app.server` splits it across its workers as their MONGO_MAX_POOL_SIZE
+    MONGO_TOTAL_MAX_POOL_SIZE: int = 0
+
+    # principal cache for tokens issued without embedded user claims
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 300
+
+    # verified bearer tokens, keyed by digest
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 600
+
+    # blog totals returned with listings
+    BLOG_COUNT_CACHE_MAX_SIZE: int = 10000
+    BLOG_COUNT_CACHE_TTL_SECONDS: int = 60
+
+    # write-behind buffer for likes/dislikes/comments counters
+    COUNTER_BUFFER_ENABLED: bool = True
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    COUNTER_FLUSH_MAX_PENDING: int = 1000
+
+    # cached GET /blogs/ and GET /blogs/{blog_id} responses, per process
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # most recent comments embedded in each blog for the detail view, 0 disables it
+    COMMENT_PREVIEW_SIZE: int = 3
+
+    # documents per driver batch and per streamed chunk of the NDJSON exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # items accepted by one bulk ingest request, its body is capped at BULK_MAX_ITEMS
+    # times BULK_MAX_ITEM_BYTES and refused before it is read in full
+    BULK_MAX_ITEMS: int = 1000
+    BULK_MAX_ITEM_BYTES: int = 16384
+
+    # GET /blogs/trending, materialized in the trending_blogs collection. Engagement
+    # halves every half-life, blogs older than the window drop out of the feed
+    TRENDING_ENABLED: bool = True
+    TRENDING_HALF_LIFE_HOURS: float = 12.0
+    TRENDING_WINDOW_HOURS: float = 72.0
+    TRENDING_LIKE_WEIGHT: float = 1.0
+    TRENDING_DISLIKE_WEIGHT: float = 1.0
+    TRENDING_COMMENT_WEIGHT: float = 2.0
+    # touched blogs are rescored every refresh interval, the whole window every recompute interval
+    TRENDING_REFRESH_INTERVAL_SECONDS: float = 2.0
+    TRENDING_RECOMPUTE_INTERVAL_SECONDS: float = 600.0
+
+    # comments and reactions of deleted blogs are removed by a background job, in batches
+    CASCADE_BATCH_SIZE: int = 500
+    CASCADE_POLL_INTERVAL_SECONDS: float = 5.0
+    CASCADE_LEASE_SECONDS: float = 60.0
+    CASCADE_MAX_ATTEMPTS: int = 10
+
+    # token buckets per authenticated user or client address on the reaction, comment and bulk
+    # writes, a bulk request takes one token whatever its number of items
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REACTIONS_PER_SECOND: float = 5.0
+    RATE_LIMIT_REACTIONS_BURST: int = 20
+    RATE_LIMIT_COMMENTS_PER_SECOND: float = 1.0
+    RATE_LIMIT_COMMENTS_BURST: int = 10
+    RATE_LIMIT_BULK_PER_SECOND: float = 0.5
+    RATE_LIMIT_BULK_BURST: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100000
+
+    # Mongo commands are attributed to the request that issued them, requests doing more
+    # round trips than the budget are logged as warnings and counted on /metrics
+    INSTRUMENTATION_ENABLED: bool = True
+    MAX_MONGO_ROUND_TRIPS: int = 4
+
+    # `python -m app.server`, 0 workers starts one per core
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    # in-flight requests get this long to finish on shutdown, before buffered writes are flushed
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    # requests are already logged by the instrumentation middleware
+    SERVER_ACCESS_LOG: bool = False
+
+    # password hashing runs in a bounded thread pool, requests beyond the queue limit get a 503
+    BCRYPT_ROUNDS: int = 12
+    HASHING_MAX_WORKERS: int = 4
+    HASHING_QUEUE_LIMIT: int = 64
+
+    @property
+    def mongo_uri(self) -> str:
+        credentials = ""
+        if self.MONGO_USER:
+            credentials = quote_plus(self.MONGO_USER) + ":" + quote_plus(self.MONGO_PWD) + "@"
+        return "mongodb://" + credentials + str(self.MONGO_IP) + ":" + str(self.MONGO_PORT)
+
     class Config:
         env_file = 'app/.env'
 
 
-settings = Settings()
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings()
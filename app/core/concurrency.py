@@ -0,0 +1,40 @@
+import sys
+from typing import Any, Awaitable, Callable, List, Optional
+
+import anyio
+
+if sys.version_info < (3, 11):
+    from exceptiongroup import BaseExceptionGroup
+
+
+def _first_error(group: BaseExceptionGroup) -> BaseException:
+    error = group.exceptions[0]
+    return _first_error(error) if isinstance(error, BaseExceptionGroup) else error
+
+
+async def gather(*calls: Callable[[], Awaitable], limit: Optional[int] = None) -> List[Any]:
+    """
+    Run independent operations concurrently in an anyio task group, at most `limit` at a time,
+    and return their results in order. Each operation is a function taking no arguments, it
+    is only called once a slot is free (Motor starts a command as soon as it is called).
+
+    The first failure cancels the operations still running and is raised as is rather than
+    wrapped in an exception group, so an HTTPException from one of them reaches the client.
+    """
+    results: List[Any] = [None] * len(calls)
+    limiter = anyio.CapacityLimiter(limit) if limit is not None else None
+
+    async def run(index: int, call: Callable[[], Awaitable]):
+        if limiter is None:
+            results[index] = await call()
+            return
+        async with limiter:
+            results[index] = await call()
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            for index, call in enumerate(calls):
+                task_group.start_soon(run, index, call)
+    except BaseExceptionGroup as group:
+        raise _first_error(group) from None
+    return results
@@ -0,0 +1,44 @@
+import threading
+from contextvars import ContextVar
+from typing import List, NamedTuple, Optional
+
+
+class CommandRecord(NamedTuple):
+    collection: str
+    command: str
+    duration: float
+    documents: int
+    failed: bool = False
+
+
+class RequestStats:
+    """
+    Mongo commands issued on behalf of one request.
+
+    Motor runs commands on its executor threads with a copy of the caller's context,
+    so the command listener finds the request through `current_request_stats` and
+    appends from those threads.
+    """
+
+    def __init__(self):
+        self.commands: List[CommandRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: CommandRecord):
+        with self._lock:
+            self.commands.append(record)
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.commands)
+
+    @property
+    def mongo_seconds(self) -> float:
+        return sum(record.duration for record in self.commands)
+
+    @property
+    def documents(self) -> int:
+        return sum(record.documents for record in self.commands)
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
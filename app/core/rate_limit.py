@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class RateLimitBackend:
+    """
+    Token bucket storage of the rate limiter, implement it to share buckets between processes.
+    """
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """
+        Take one token from the bucket `key`, which refills at `rate` tokens per second up
+        to `burst`. Returns whether a token was available and, when it was not, the seconds
+        until one will be.
+        """
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets, the least recently used ones are dropped beyond `max_keys`.
+    A dropped bucket comes back full, which only ever errs on the side of allowing.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time of the last update)
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    async def clear(self):
+        self._buckets.clear()
@@ -0,0 +1,20 @@
+import os
+import time
+
+
+# set by `python -m app.server` for its workers, this module keeps uvicorn out of `app.main`
+LAUNCHED_AT_ENV = "APP_SERVER_LAUNCHED_AT"
+PRELOAD_SECONDS_ENV = "APP_SERVER_PRELOAD_SECONDS"
+
+
+def startup_report(lifespan_seconds: float) -> dict:
+    """
+    Cold start timings of this process in milliseconds, the launch and preload times are only
+    known when it was started by `python -m app.server`.
+    """
+    report = {"pid": os.getpid(), "lifespan_ms": round(lifespan_seconds * 1000, 1)}
+    if LAUNCHED_AT_ENV in os.environ:
+        report["since_launch_ms"] = round((time.time() - float(os.environ[LAUNCHED_AT_ENV])) * 1000, 1)
+    if PRELOAD_SECONDS_ENV in os.environ:
+        report["preload_ms"] = round(float(os.environ[PRELOAD_SECONDS_ENV]) * 1000, 1)
+    return report
@@ -0,0 +1,70 @@
+"""
+Backfill of `author_id` on documents written before authors had stable ids.
+
+Blogs (`created_by`), comments and reactions (`user_id`) used to store the
+author's display name only. Names that belong to exactly one user are resolved
+to that user's id. Names shared by several users, or by no user any more, are
+reported and left alone. The backfill is idempotent and only touches documents
+without an `author_id`.
+
+    python -m app.db.author_ids
+"""
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from typing import Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateMany
+
+
+# collection -> field holding the author's name
+NAME_FIELDS = {
+    "blogs": "created_by",
+    "comments": "user_id",
+    "user_reactions": "user_id",
+}
+
+
+async def backfill_author_ids(mongo_db: AsyncIOMotorDatabase, batch_size: int = 1000) -> Dict[str, dict]:
+    ids_by_name = defaultdict(set)
+    async for user in mongo_db.users.find({}, {"name": True}):
+        ids_by_name[user["name"]].add(str(user["_id"]))
+    resolved = {name: ids.pop() for name, ids in ids_by_name.items() if len(ids) == 1}
+
+    report = {}
+    for collection, name_field in NAME_FIELDS.items():
+        missing = {"author_id": {"$exists": False}}
+        names = await mongo_db[collection].distinct(name_field, missing)
+        operations = [
+            UpdateMany({name_field: name, **missing}, {"$set": {"author_id": resolved[name]}})
+            for name in names if name in resolved
+        ]
+        updated = 0
+        for offset in range(0, len(operations), batch_size):
+            result = await mongo_db[collection].bulk_write(operations[offset:offset + batch_size], ordered=False)
+            updated += result.modified_count
+        report[collection] = {
+            "updated": updated,
+            "unresolved_names": sorted(name for name in names if name not in resolved),
+        }
+    return report
+
+
+async def _main() -> int:
+    from app.config import get_settings
+    from app.db.client import create_mongo_client
+
+    settings = get_settings()
+    client = create_mongo_client(settings)
+    try:
+        report = await backfill_author_ids(client[settings.MONGO_DB])
+    finally:
+        client.close()
+    print(json.dumps(report, indent=2))
+    return 1 if any(result["unresolved_names"] for result in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# collections holding documents of a blog, by `blog_id`, emptied in this order
+CASCADE_COLLECTIONS = ("user_reactions", "comments")
+
+
+class CascadeDeleter:
+    """
+    Removes the comments and reactions of deleted blogs in the background.
+
+    Every deleted blog gets a job in `delete_jobs`, written before the blog itself is
+    deleted, that records how many documents were removed per collection. The job
+    deletes the blog too, so a request that dies between the two writes leaves no
+    orphans behind. Workers claim jobs with a lease, so jobs left
+    behind by a crashed or restarted process are picked up again once their lease
+    expires. Documents go in batches of `batch_size` ids. Failed jobs are retried
+    with exponential backoff and given up after `max_attempts`.
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float, lease: float, max_attempts: int):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._mongo_db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.completed = 0
+        self.failed_attempts = 0
+        self.deleted = {collection: 0 for collection in CASCADE_COLLECTIONS}
+
+    @property
+    def running(self) -> bool:
+        return self._mongo_db is not None
+
+    def start(self, mongo_db: AsyncIOMotorDatabase):
+        self._mongo_db = mongo_db
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._mongo_db = None
+
+    async def _run(self):
+        while True:
+            try:
+                while await self.run_once():
+                    pass
+            except Exception:
+                logger.exception("Claiming blog delete jobs failed")
+            self._wakeup.clear()
+            # not wait_for, which can swallow the cancellation of stop() when the event is set at the same time
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait([waiter], timeout=self.poll_interval)
+            finally:
+                waiter.cancel()
+
+    async def enqueue(self, mongo_db: AsyncIOMotorDatabase, blog_id: ObjectId):
+        """
+        Record the job of a blog about to be deleted, it is processed right away when the worker runs in this process.
+        """
+        now = datetime.now()
+        await mongo_db.delete_jobs.update_one(
+            {"_id": blog_id},
+            {
+                "$setOnInsert": {
+                    "status": "pending",
+                    "created_at": now,
+                    "attempts": 0,
+                    "deleted": {collection: 0 for collection in CASCADE_COLLECTIONS},
+                    "next_attempt_at": now,
+                    "lease_until": now,
+                },
+            },
+            upsert=True,
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_once(self) -> bool:
+        """
+        Claim and process one due job, returns False when there is none.
+        """
+        if self._mongo_db is None:
+            return False
+        now = datetime.now()
+        job = await self._mongo_db.delete_jobs.find_one_and_update(
+            {"status": "pending", "next_attempt_at": {"$lte": now}, "lease_until": {"$lte": now}},
+            {"$set": {"lease_until": now + timedelta(seconds=self.lease)}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return False
+        try:
+            await self._process(job["_id"])
+        except Exception as exc:
+            await self._retry_later(job, exc)
+        return True
+
+    async def _process(self, blog_id: ObjectId):
+        jobs = self._mongo_db.delete_jobs
+        # normally gone already, the request deletes it right after writing the job
+        await self._mongo_db.blogs.delete_one({"_id": blog_id})
+        for collection in CASCADE_COLLECTIONS:
+            while True:
+                batch = self._mongo_db[collection].find({"blog_id": blog_id}, {"_id": True}).limit(self.batch_size)
+                ids = [document["_id"] async for document in batch]
+                if not ids:
+                    break
+                result = await self._mongo_db[collection].delete_many({"_id": {"$in": ids}})
+                self.deleted[collection] += result.deleted_count
+                await jobs.update_one(
+                    {"_id": blog_id},
+                    {
+                        "$inc": {f"deleted.{collection}": result.deleted_count},
+                        "$set": {"lease_until": datetime.now() + timedelta(seconds=self.lease)},
+                    },
+                )
+        now = datetime.now()
+        await jobs.update_one(
+            {"_id": blog_id},
+            {"$set": {"status": "done", "finished_at": now, "lease_until": now}},
+        )
+        self.completed += 1
+
+    async def _retry_later(self, job: dict, exc: Exception):
+        self.failed_attempts += 1
+        attempts = job["attempts"] + 1
+        logger.exception("Deleting the documents of blog %s failed, attempt %s", job["_id"], attempts)
+        now = datetime.now()
+        await self._mongo_db.delete_jobs.update_one(
+            {"_id": job["_id"]},
+            {"$set": {
+                "status": "failed" if attempts >= self.max_attempts else "pending",
+                "attempts": attempts,
+                "last_error": str(exc),
+                "next_attempt_at": now + timedelta(seconds=min(2 ** attempts, 300)),
+                "lease_until": now,
+            }},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "failed_attempts": self.failed_attempts,
+            "deleted": dict(self.deleted),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_cascade_deleter() -> CascadeDeleter:
+    settings = get_settings()
+    return CascadeDeleter(
+        batch_size=settings.CASCADE_BATCH_SIZE,
+        poll_interval=settings.CASCADE_POLL_INTERVAL_SECONDS,
+        lease=settings.CASCADE_LEASE_SECONDS,
+        max_attempts=settings.CASCADE_MAX_ATTEMPTS,
+    )
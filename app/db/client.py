@@ -0,0 +1,150 @@
+import threading
+from collections import defaultdict
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.config import Settings
+from app.core.instrumentation import CommandRecord, current_request_stats
+from app.core.metrics import registry
+
+
+mongo_command_seconds = registry.histogram(
+    "mongo_command_duration_seconds", "Duration of Mongo commands.", ("collection", "command"),
+)
+mongo_documents_returned = registry.counter(
+    "mongo_documents_returned_total", "Documents returned by Mongo commands.", ("collection", "command"),
+)
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Keeps per-server connection pool counters, pymongo calls it from its own threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = defaultdict(lambda: {
+            "open": 0,
+            "checked_out": 0,
+            "created": 0,
+            "closed": 0,
+            "checkout_failed": 0,
+            "cleared": 0,
+        })
+
+    def _update(self, address, **changes):
+        key = "%s:%s" % address
+        with self._lock:
+            stats = self._servers[key]
+            for name, delta in changes.items():
+                stats[name] += delta
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._servers.items()}
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._update(event.address, created=1, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, closed=1, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, checkout_failed=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, checked_out=-1)
+
+
+def _documents_returned(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    if command_name == "findAndModify":
+        return 0 if reply.get("value") is None else 1
+    return 0
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """
+    Times every Mongo command into the per-command metrics and the RequestStats of the
+    request it was issued for, pymongo calls it from the thread that runs the command.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (connection, request id) -> (collection, command, RequestStats or None)
+        self._pending = {}
+
+    def started(self, event):
+        name = event.command_name
+        collection = event.command.get("collection" if name == "getMore" else name)
+        if not isinstance(collection, str):
+            # admin commands such as ping
+            collection = ""
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, name, current_request_stats.get())
+
+    def succeeded(self, event):
+        self._finish(event, _documents_returned(event.command_name, event.reply), failed=False)
+
+    def failed(self, event):
+        self._finish(event, 0, failed=True)
+
+    def _finish(self, event, documents: int, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, name, stats = pending
+        duration = event.duration_micros / 1e6
+        mongo_command_seconds.observe((collection, name), duration)
+        if documents:
+            mongo_documents_returned.inc((collection, name), documents)
+        if stats is not None:
+            stats.add(CommandRecord(collection, name, duration, documents, failed))
+
+
+def create_mongo_client(
+    settings: Settings,
+    pool_listener: PoolStatsListener = None,
+    command_listener: CommandStatsListener = None,
+) -> AsyncIOMotorClient:
+    """
+    Build the process-wide client, it is created once in the app lifespan and shared by all requests.
+    """
+    event_listeners = [listener for listener in (pool_listener, command_listener) if listener is not None]
+    return AsyncIOMotorClient(
+        settings.mongo_uri,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        readPreference=settings.MONGO_READ_PREFERENCE,
+        event_listeners=event_listeners,
+    )
@@ -0,0 +1,56 @@
+from typing import Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+from app.config import get_settings
+
+
+# the N most recent comments are embedded in the blog as `recent_comments`,
+# so the blog detail can show them without querying the comments collection
+PREVIEW_FIELDS = ("_id", "user_id", "author_id", "comment", "created_at")
+
+
+def _preview_push(comments: List[dict]) -> dict:
+    return {
+        "$push": {
+            "recent_comments": {
+                "$each": [{field: comment[field] for field in PREVIEW_FIELDS} for comment in comments],
+                "$sort": {"created_at": -1, "_id": -1},
+                "$slice": get_settings().COMMENT_PREVIEW_SIZE,
+            }
+        }
+    }
+
+
+async def push_comment_previews(collection: AsyncIOMotorCollection, blog_id: ObjectId, comments: List[dict]):
+    if get_settings().COMMENT_PREVIEW_SIZE and comments:
+        await collection.update_one({"_id": blog_id}, _preview_push(comments))
+
+
+async def push_comment_previews_many(collection: AsyncIOMotorCollection, comments_by_blog: Dict[ObjectId, List[dict]]):
+    if not get_settings().COMMENT_PREVIEW_SIZE:
+        return
+    operations = [
+        UpdateOne({"_id": blog_id}, _preview_push(comments))
+        for blog_id, comments in comments_by_blog.items() if comments
+    ]
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+
+
+async def pull_comment_preview(collection: AsyncIOMotorCollection, blog_id: ObjectId, comment_id: ObjectId):
+    """
+    Drop a deleted comment from the preview, it is refilled as new comments arrive.
+    """
+    if get_settings().COMMENT_PREVIEW_SIZE:
+        await collection.update_one({"_id": blog_id}, {"$pull": {"recent_comments": {"_id": comment_id}}})
+
+
+async def update_comment_preview(collection: AsyncIOMotorCollection, blog_id: ObjectId, comment_id: ObjectId, comment: str):
+    if get_settings().COMMENT_PREVIEW_SIZE:
+        await collection.update_one(
+            {"_id": blog_id, "recent_comments._id": comment_id},
+            {"$set": {"recent_comments.$.comment": comment}},
+        )
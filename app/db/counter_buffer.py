@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from app.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for the likes/dislikes/comments counters of blogs.
+
+    Deltas are coalesced per blog and written with one unordered bulk_write every
+    `flush_interval` seconds, or as soon as `max_pending` blogs have pending deltas.
+    Reads in this process overlay the pending deltas with `apply_pending`.
+
+    A failed flush puts back only the deltas known not to be written: the operations
+    with a write error in a BulkWriteError, or the whole batch when no server could be
+    selected. When the outcome is unknown (a network error mid-write) the batch is
+    dropped and logged, an undercount is preferred over applying an `$inc` twice.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[ObjectId, Counter] = defaultdict(Counter)
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._background = set()
+        self.flushes = 0
+        self.flushed_updates = 0
+        self.failed_flushes = 0
+        self.dropped_updates = 0
+
+    @property
+    def running(self) -> bool:
+        return self._collection is not None
+
+    def start(self, collection: AsyncIOMotorCollection):
+        self._collection = collection
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Flushing blog counters on shutdown failed, %s pending", self.stats())
+        self._collection = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing blog counters failed")
+
+    def add(self, blog_id: ObjectId, deltas: dict):
+        pending = self._pending[blog_id]
+        pending.update(deltas)
+        if len(self._pending) >= self.max_pending and self.running and not self._flush_lock.locked():
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def pending_for(self, blog_id: ObjectId) -> dict:
+        pending = self._pending.get(blog_id)
+        return dict(pending) if pending else {}
+
+    def apply_pending(self, document: dict, blog_id: ObjectId = None) -> dict:
+        """
+        Add deltas that are not flushed yet to the counters of a blog document.
+        """
+        for field, delta in self.pending_for(blog_id or document["_id"]).items():
+            if field in document:
+                document[field] += delta
+        return document
+
+    async def flush(self):
+        if self._collection is None:
+            return
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, defaultdict(Counter)
+            # (blog id, deltas) of each operation, by position in the bulk write
+            batch = []
+            for blog_id, deltas in pending.items():
+                deltas = {field: delta for field, delta in deltas.items() if delta}
+                if deltas:
+                    batch.append((blog_id, deltas))
+            if not batch:
+                return
+            operations = [UpdateOne({"_id": blog_id}, {"$inc": deltas}) for blog_id, deltas in batch]
+            try:
+                await self._collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as exc:
+                # unordered, every operation without a write error was applied and must not be retried
+                self.failed_flushes += 1
+                failed = {error["index"] for error in exc.details.get("writeErrors", [])}
+                self._requeue(batch[index] for index in failed)
+                self.flushed_updates += len(batch) - len(failed)
+                raise
+            except ServerSelectionTimeoutError:
+                # no server was selected, nothing was sent
+                self.failed_flushes += 1
+                self._requeue(batch)
+                raise
+            except Exception:
+                # the batch may or may not have been applied and $inc is not idempotent,
+                # counters are written at most once so the deltas are dropped
+                self.failed_flushes += 1
+                self.dropped_updates += len(batch)
+                logger.error("Dropped counter deltas of a flush with an unknown outcome: %s", batch)
+                raise
+            self.flushes += 1
+            self.flushed_updates += len(batch)
+
+    def _requeue(self, batch):
+        for blog_id, deltas in batch:
+            self._pending[blog_id].update(deltas)
+
+    def stats(self) -> dict:
+        return {
+            "pending_blogs": len(self._pending),
+            "pending_deltas": sum(abs(delta) for deltas in self._pending.values() for delta in deltas.values()),
+            "flushes": self.flushes,
+            "flushed_updates": self.flushed_updates,
+            "failed_flushes": self.failed_flushes,
+            "dropped_updates": self.dropped_updates,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_counter_buffer() -> CounterBuffer:
+    settings = get_settings()
+    return CounterBuffer(
+        flush_interval=settings.COUNTER_FLUSH_INTERVAL_SECONDS,
+        max_pending=settings.COUNTER_FLUSH_MAX_PENDING,
+    )
+
+
+async def increment_counters(collection: AsyncIOMotorCollection, blog_id: ObjectId, deltas: dict, session=None):
+    """
+    Apply counter deltas to a blog, through the buffer unless it is disabled or a transaction is in use.
+    """
+    counter_buffer = get_counter_buffer()
+    if session is None and counter_buffer.running:
+        counter_buffer.add(blog_id, deltas)
+        return
+    await collection.update_one({"_id": blog_id}, {"$inc": deltas}, session=session)
+
+
+async def increment_counters_many(collection: AsyncIOMotorCollection, deltas_by_blog: Dict[ObjectId, dict]):
+    """
+    Apply counter deltas to many blogs, with one unordered bulk_write when the buffer is not running.
+    """
+    counter_buffer = get_counter_buffer()
+    if counter_buffer.running:
+        for blog_id, deltas in deltas_by_blog.items():
+            counter_buffer.add(blog_id, deltas)
+        return
+    operations = [UpdateOne({"_id": blog_id}, {"$inc": deltas}) for blog_id, deltas in deltas_by_blog.items()]
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+
+
+class BlogCounts:
+    """
+    Cached number of blogs, globally and per author.
+
+    Writes in this process adjust the cached totals in place, the TTL bounds how long
+    writes made by other processes stay invisible.
+    """
+
+    _GLOBAL = ("__all__",)
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _key(self, created_by: str = None):
+        return self._GLOBAL if created_by is None else created_by
+
+    async def get(self, mongo_db: AsyncIOMotorDatabase, created_by: str = None, estimated: bool = False) -> int:
+        key = self._key(created_by)
+        count = self._cache.get(key)
+        if count is not None:
+            return count
+        if created_by is None and estimated:
+            # metadata based, does not scan the collection
+            return await mongo_db.blogs.estimated_document_count()
+        filter_query = {} if created_by is None else {"created_by": created_by}
+        count = await mongo_db.blogs.count_documents(filter_query)
+        self._cache.set(key, count)
+        return count
+
+    def incr(self, created_by: str, delta: int = 1):
+        self._cache.incr(self._GLOBAL, delta)
+        self._cache.incr(created_by, delta)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+@lru_cache(maxsize=None)
+def get_blog_counts() -> BlogCounts:
+    settings = get_settings()
+    return BlogCounts(maxsize=settings.BLOG_COUNT_CACHE_MAX_SIZE, ttl=settings.BLOG_COUNT_CACHE_TTL_SECONDS)
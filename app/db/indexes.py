@@ -0,0 +1,198 @@
+"""
+Index management for every collection the app queries.
+
+Indexes are declared next to the models and created idempotently at startup.
+The same declarations drive the drift report and the explain() check of the
+query shapes used by the routes.
+
+    python -m app.db.indexes ensure|drift|explain
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime
+from typing import Dict, List, Mapping, NamedTuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from app.models.blogs import BLOG_INDEXES, COMMENT_INDEXES, DELETE_JOB_INDEXES, TRENDING_INDEXES, USER_REACTION_INDEXES
+from app.models.users import USER_INDEXES
+
+
+COLLECTION_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": USER_INDEXES,
+    "blogs": BLOG_INDEXES,
+    "comments": COMMENT_INDEXES,
+    "user_reactions": USER_REACTION_INDEXES,
+    "trending_blogs": TRENDING_INDEXES,
+    "delete_jobs": DELETE_JOB_INDEXES,
+}
+
+
+# server error code of dropping an index that does not exist
+INDEX_NOT_FOUND = 27
+
+# indexes replaced by a later declaration, dropped by ensure_indexes
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    # unique on the display name, two users sharing a name could not react to the same blog
+    "user_reactions": ["blog_id_user_id_unique"],
+}
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: dict
+    sort: list = None
+
+
+_sample_id = ObjectId()
+_sample_time = datetime(2024, 1, 1)
+
+# the queries issued by the routes, with placeholder values
+QUERY_SHAPES = [
+    QueryShape("users.by_email", "users", {"email": "user@example.com"}),
+    QueryShape("blogs.list", "blogs", {}, [("created_at", -1), ("_id", -1)]),
+    QueryShape(
+        "blogs.list_after_cursor",
+        "blogs",
+        {"$or": [
+            {"created_at": {"$lt": _sample_time}},
+            {"created_at": _sample_time, "_id": {"$lt": _sample_id}},
+        ]},
+        [("created_at", -1), ("_id", -1)],
+    ),
+    QueryShape("blogs.list_by_author", "blogs", {"created_by": "name"}, [("created_at", -1), ("_id", -1)]),
+    QueryShape("blogs.list_by_author_id", "blogs", {"author_id": str(_sample_id)}, [("created_at", -1), ("_id", -1)]),
+    QueryShape("blogs.search", "blogs", {"$text": {"$search": "python"}}),
+    QueryShape("trending_blogs.page", "trending_blogs", {}, [("score", -1), ("_id", -1)]),
+    QueryShape("comments.by_blog", "comments", {"blog_id": _sample_id}, [("created_at", -1), ("_id", -1)]),
+    QueryShape("user_reactions.by_blog", "user_reactions", {"blog_id": _sample_id}),
+    QueryShape(
+        "delete_jobs.due",
+        "delete_jobs",
+        {"status": "pending", "next_attempt_at": {"$lte": _sample_time}, "lease_until": {"$lte": _sample_time}},
+        [("next_attempt_at", 1)],
+    ),
+    QueryShape("user_reactions.by_blog_and_author", "user_reactions", {"blog_id": _sample_id, "author_id": str(_sample_id)}),
+]
+
+
+async def ensure_indexes(mongo_db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    Drop retired indexes and create every declared index, existing ones with the same
+    definition are left untouched.
+    """
+    for collection, names in RETIRED_INDEXES.items():
+        existing = await mongo_db[collection].index_information()
+        for name in names:
+            if name in existing:
+                try:
+                    await mongo_db[collection].drop_index(name)
+                except OperationFailure as exc:
+                    # every server worker runs this at startup, another one dropped it first
+                    if exc.code != INDEX_NOT_FOUND:
+                        raise
+    created = {}
+    for collection, indexes in COLLECTION_INDEXES.items():
+        created[collection] = await mongo_db[collection].create_indexes(indexes)
+    return created
+
+
+def _definition(index: dict) -> dict:
+    key = index["key"]
+    if isinstance(key, Mapping):
+        key = key.items()
+    key = [(field, direction) for field, direction in key]
+    options = {"unique": bool(index.get("unique", False))}
+    for option in ("partialFilterExpression", "expireAfterSeconds"):
+        if index.get(option) is not None:
+            options[option] = index[option]
+    if any(direction == "text" for _, direction in key):
+        # the server reports text indexes as _fts/_ftsx keys, compare their weights instead
+        text_fields = [field for field, direction in key if direction == "text" and field != "_fts"]
+        weights = index.get("weights") or {field: 1 for field in text_fields}
+        return {"text": dict(weights), **options}
+    return {"key": key, **options}
+
+
+async def index_drift(mongo_db: AsyncIOMotorDatabase) -> Dict[str, dict]:
+    """
+    Compare declared indexes with the ones in the database, only collections with drift are reported.
+    """
+    report = {}
+    for collection, indexes in COLLECTION_INDEXES.items():
+        existing = await mongo_db[collection].index_information()
+        existing.pop("_id_", None)
+        missing, changed = [], []
+        for index in indexes:
+            declared = index.document
+            name = declared["name"]
+            if name not in existing:
+                missing.append(name)
+            elif _definition(declared) != _definition(existing[name]):
+                changed.append(name)
+        declared_names = {index.document["name"] for index in indexes}
+        extra = sorted(name for name in existing if name not in declared_names)
+        if missing or changed or extra:
+            report[collection] = {"missing": missing, "changed": changed, "extra": extra}
+    return report
+
+
+def _plan_stages(plan: dict):
+    yield plan
+    for child in plan.get("inputStages", []) + [plan[k] for k in ("inputStage", "queryPlan") if k in plan]:
+        yield from _plan_stages(child)
+
+
+async def explain_query_shapes(mongo_db: AsyncIOMotorDatabase) -> List[dict]:
+    """
+    Run explain() on every query shape and report which index, if any, the winning plan uses.
+    """
+    results = []
+    for shape in QUERY_SHAPES:
+        command = {"find": shape.collection, "filter": shape.filter}
+        if shape.sort:
+            command["sort"] = dict(shape.sort)
+        explained = await mongo_db.command("explain", command, verbosity="queryPlanner")
+        stages = list(_plan_stages(explained["queryPlanner"]["winningPlan"]))
+        index_names = sorted({stage["indexName"] for stage in stages if "indexName" in stage})
+        results.append({
+            "query": shape.name,
+            "indexes": index_names,
+            "collection_scan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+            "in_memory_sort": any(stage.get("stage") == "SORT" for stage in stages),
+        })
+    return results
+
+
+async def _main(action: str) -> int:
+    from app.config import get_settings
+    from app.db.client import create_mongo_client
+
+    settings = get_settings()
+    client = create_mongo_client(settings)
+    mongo_db = client[settings.MONGO_DB]
+    try:
+        if action == "ensure":
+            print(json.dumps(await ensure_indexes(mongo_db), indent=2))
+            return 0
+        if action == "drift":
+            report = await index_drift(mongo_db)
+            print(json.dumps(report, indent=2))
+            return 1 if report else 0
+        if action == "explain":
+            results = await explain_query_shapes(mongo_db)
+            print(json.dumps(results, indent=2))
+            return 1 if any(r["collection_scan"] or r["in_memory_sort"] for r in results) else 0
+    finally:
+        client.close()
+    print("usage: python -m app.db.indexes ensure|drift|explain", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "")))
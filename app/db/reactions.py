@@ -0,0 +1,132 @@
+from typing import Awaitable, Callable, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.db.counter_buffer import get_counter_buffer, increment_counters
+
+
+def _conflict():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Reaction could not be recorded, please try again.",
+    )
+
+
+async def _run_write(mongo_db: AsyncIOMotorDatabase, write: Callable[..., Awaitable]):
+    """
+    Await `write(session)` inside a transaction when MONGO_USE_TRANSACTIONS is set, with
+    a None session otherwise.
+
+    The driver runs the transaction again on transient errors. A concurrent upsert
+    winning the unique key aborts the transaction on the server, so it is run once more
+    from the start, where the upsert finds the winner's document.
+    """
+    if not get_settings().MONGO_USE_TRANSACTIONS:
+        return await write(None)
+    async with await mongo_db.client.start_session() as session:
+        try:
+            return await session.with_transaction(write)
+        except DuplicateKeyError:
+            pass
+        try:
+            return await session.with_transaction(write)
+        except DuplicateKeyError:
+            raise _conflict()
+
+
+def _blog_not_found():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Blog with given id does not exists!",
+    )
+
+
+async def _upsert_reaction(mongo_db, blog_id, author_id, user_id, reaction_type, session) -> Optional[dict]:
+    query = {"blog_id": blog_id, "author_id": author_id}
+    update = {"$set": {"reaction_type": reaction_type, "user_id": user_id}}
+    try:
+        return await mongo_db.user_reactions.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.BEFORE, session=session,
+        )
+    except DuplicateKeyError:
+        if session is not None:
+            # the transaction is aborted, _run_write starts it over
+            raise
+        # a concurrent upsert for the same (blog_id, author_id) won the insert, now it is a plain update
+        previous = await mongo_db.user_reactions.find_one_and_update(
+            query, update, return_document=ReturnDocument.BEFORE, session=session,
+        )
+        if previous is None:
+            # the duplicate key came from another unique index, nothing was written so the
+            # counters must not move either
+            raise _conflict()
+        return previous
+
+
+async def set_reaction(
+    mongo_db: AsyncIOMotorDatabase, blog_id: ObjectId, author_id: str, user_id: str, reaction_type: str,
+) -> dict:
+    """
+    Record the reaction of the user with id `author_id` and name `user_id`, switching an existing opposite reaction, with one upsert and one `$inc`.
+    """
+    async def write(session):
+        counter_buffer = get_counter_buffer()
+        buffered = session is None and counter_buffer.running
+        if buffered:
+            # buffered counters cannot report a missing blog, check it up front from the _id index
+            blog = await mongo_db.blogs.find_one({"_id": blog_id}, {"_id": True})
+            if blog is None:
+                raise _blog_not_found()
+        previous = await _upsert_reaction(mongo_db, blog_id, author_id, user_id, reaction_type, session)
+        if previous is not None and previous["reaction_type"] == reaction_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already reacted. Please undo reaction and try again.",
+            )
+        counters = {reaction_type: 1}
+        if previous is not None:
+            counters[previous["reaction_type"]] = -1
+        if buffered:
+            counter_buffer.add(blog_id, counters)
+        else:
+            result = await mongo_db.blogs.update_one({"_id": blog_id}, {"$inc": counters}, session=session)
+            if result.matched_count == 0:
+                if session is None:
+                    # no transaction to abort, put the reaction back the way it was
+                    if previous is None:
+                        await mongo_db.user_reactions.delete_one({"blog_id": blog_id, "author_id": author_id})
+                    else:
+                        await mongo_db.user_reactions.update_one(
+                            {"_id": previous["_id"]},
+                            {"$set": {"reaction_type": previous["reaction_type"]}},
+                        )
+                raise _blog_not_found()
+
+    await _run_write(mongo_db, write)
+    return {
+        "user_id": user_id,
+        "author_id": author_id,
+        "blog_id": blog_id,
+        "reaction_type": reaction_type,
+    }
+
+
+async def remove_reaction(mongo_db: AsyncIOMotorDatabase, blog_id: ObjectId, author_id: str, reaction_type: str):
+    async def write(session):
+        user_reaction = await mongo_db.user_reactions.find_one_and_delete(
+            {"blog_id": blog_id, "author_id": author_id, "reaction_type": reaction_type},
+            session=session,
+        )
+        if user_reaction is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have not reacted yet.",
+            )
+        await increment_counters(mongo_db.blogs, blog_id, {reaction_type: -1}, session=session)
+
+    await _run_write(mongo_db, write)
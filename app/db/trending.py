@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteOne, ReplaceOne
+
+from app.config import get_settings
+from app.db.counter_buffer import get_counter_buffer
+
+
+logger = logging.getLogger(__name__)
+
+_SCORE_FIELDS = {"likes": True, "dislikes": True, "comments": True, "created_at": True}
+
+
+class TrendingMaterializer:
+    """
+    Keeps the `trending_blogs` collection that backs GET /blogs/trending.
+
+    A blog's engagement decays by half every `half_life` seconds. The score is the
+    log2 of the engagement plus the creation time in half-lives, so scores of blogs
+    that are not touched never need rewriting to stay in order.
+
+    Reaction and comment writes mark their blog with `touch`. Marked blogs are
+    rescored every `refresh_interval` seconds. Every `recompute_interval` seconds
+    the whole window is rebuilt from `blogs`. This drops blogs older than `window`
+    and picks up writes made by other processes.
+    """
+
+    def __init__(
+        self,
+        half_life: float,
+        window: float,
+        refresh_interval: float,
+        recompute_interval: float,
+        weights: Dict[str, float],
+    ):
+        self.half_life = half_life
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.recompute_interval = recompute_interval
+        self.weights = weights
+        # blog id -> monotonic time it was first touched since the last refresh
+        self._dirty: Dict[ObjectId, float] = {}
+        self._mongo_db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.refreshed_blogs = 0
+        self.failed_refreshes = 0
+        self.recomputes = 0
+        self.last_refresh_lag: Optional[float] = None
+        self.last_recompute_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._mongo_db is not None
+
+    def start(self, mongo_db: AsyncIOMotorDatabase):
+        self._mongo_db = mongo_db
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # rescore what was touched since the last refresh before the process exits
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Refreshing trending blogs on shutdown failed")
+        self._mongo_db = None
+        self._dirty.clear()
+
+    async def _run(self):
+        next_recompute = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_recompute:
+                    await self.recompute()
+                    next_recompute = time.monotonic() + self.recompute_interval
+                await self.refresh()
+            except Exception:
+                logger.exception("Refreshing trending blogs failed")
+            await asyncio.sleep(self.refresh_interval)
+
+    def touch(self, blog_id: ObjectId):
+        if self.running:
+            self._dirty.setdefault(blog_id, time.monotonic())
+
+    def score(self, blog: dict) -> Optional[float]:
+        """
+        Trending score of a blog, None when it has no positive engagement.
+        """
+        engagement = sum(blog.get(field, 0) * weight for field, weight in self.weights.items())
+        if engagement <= 0:
+            return None
+        return math.log2(1 + engagement) + blog["created_at"].timestamp() / self.half_life
+
+    def _cutoff(self) -> datetime:
+        return datetime.now() - timedelta(seconds=self.window)
+
+    def _operation(self, blog: dict, cutoff: datetime, computed_at: datetime):
+        get_counter_buffer().apply_pending(blog)
+        score = self.score(blog) if blog["created_at"] >= cutoff else None
+        if score is None:
+            return DeleteOne({"_id": blog["_id"]})
+        return ReplaceOne(
+            {"_id": blog["_id"]},
+            {"score": score, "created_at": blog["created_at"], "computed_at": computed_at},
+            upsert=True,
+        )
+
+    async def refresh(self):
+        """
+        Rescore the blogs touched since the last refresh.
+        """
+        if self._mongo_db is None or not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        try:
+            cutoff, computed_at = self._cutoff(), datetime.now()
+            blogs = await self._mongo_db.blogs.find({"_id": {"$in": list(dirty)}}, _SCORE_FIELDS).to_list(None)
+            operations = [self._operation(blog, cutoff, computed_at) for blog in blogs]
+            # deleted blogs
+            found = {blog["_id"] for blog in blogs}
+            operations += [DeleteOne({"_id": blog_id}) for blog_id in dirty if blog_id not in found]
+            await self._mongo_db.trending_blogs.bulk_write(operations, ordered=False)
+        except Exception:
+            # keep the marks so the next refresh retries them
+            self.failed_refreshes += 1
+            for blog_id, touched_at in dirty.items():
+                self._dirty[blog_id] = min(touched_at, self._dirty.get(blog_id, touched_at))
+            raise
+        self.refreshes += 1
+        self.refreshed_blogs += len(dirty)
+        self.last_refresh_lag = time.monotonic() - min(dirty.values())
+
+    async def recompute(self, batch_size: int = 1000):
+        """
+        Rebuild the scores of every blog created within the window.
+        """
+        if self._mongo_db is None:
+            return
+        cutoff, computed_at = self._cutoff(), datetime.now()
+        operations = []
+        async for blog in self._mongo_db.blogs.find({"created_at": {"$gte": cutoff}}, _SCORE_FIELDS):
+            operations.append(self._operation(blog, cutoff, computed_at))
+            if len(operations) >= batch_size:
+                await self._mongo_db.trending_blogs.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await self._mongo_db.trending_blogs.bulk_write(operations, ordered=False)
+        # whatever this pass did not write has left the window or been deleted
+        await self._mongo_db.trending_blogs.delete_many({"computed_at": {"$lt": computed_at}})
+        self.recomputes += 1
+        self.last_recompute_at = time.monotonic()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "pending_blogs": len(self._dirty),
+            "lag_seconds": now - min(self._dirty.values()) if self._dirty else 0.0,
+            "last_refresh_lag_seconds": self.last_refresh_lag,
+            "last_recompute_age_seconds": now - self.last_recompute_at if self.last_recompute_at else None,
+            "refreshes": self.refreshes,
+            "refreshed_blogs": self.refreshed_blogs,
+            "failed_refreshes": self.failed_refreshes,
+            "recomputes": self.recomputes,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_trending() -> TrendingMaterializer:
+    settings = get_settings()
+    return TrendingMaterializer(
+        half_life=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+        window=settings.TRENDING_WINDOW_HOURS * 3600,
+        refresh_interval=settings.TRENDING_REFRESH_INTERVAL_SECONDS,
+        recompute_interval=settings.TRENDING_RECOMPUTE_INTERVAL_SECONDS,
+        weights={
+            "likes": settings.TRENDING_LIKE_WEIGHT,
+            "dislikes": -settings.TRENDING_DISLIKE_WEIGHT,
+            "comments": settings.TRENDING_COMMENT_WEIGHT,
+        },
+    )
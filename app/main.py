@@ -1,8 +1,61 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+
+from app.api.instrumentation import InstrumentationMiddleware
 from app.api.main import api_router
+from app.api.rate_limit import RateLimitMiddleware
+from app.api.responses import BSONResponse
+from app.auth.hashing import shutdown_hashing_pool, warm_up_hashing
+from app.config import get_settings
+from app.core.startup import startup_report
+from app.db.cascade import get_cascade_deleter
+from app.db.client import CommandStatsListener, PoolStatsListener, create_mongo_client
+from app.db.counter_buffer import get_counter_buffer
+from app.db.indexes import ensure_indexes
+from app.db.trending import get_trending
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    settings = get_settings()
+    app.state.mongo_pool_stats = PoolStatsListener()
+    app.state.mongo_command_stats = CommandStatsListener() if settings.INSTRUMENTATION_ENABLED else None
+    app.state.mongo_client = create_mongo_client(settings, app.state.mongo_pool_stats, app.state.mongo_command_stats)
+    mongo_db = app.state.mongo_client[settings.MONGO_DB]
+    if settings.MONGO_ENSURE_INDEXES:
+        await ensure_indexes(mongo_db)
+    if settings.COUNTER_BUFFER_ENABLED:
+        get_counter_buffer().start(mongo_db.blogs)
+    if settings.TRENDING_ENABLED:
+        get_trending().start(mongo_db)
+    get_cascade_deleter().start(mongo_db)
+    warm_up_hashing()
+    app.state.startup = startup_report(time.perf_counter() - started)
+    logger.info("Started %s", app.state.startup)
+    try:
+        yield
+    finally:
+        await get_cascade_deleter().stop()
+        await get_trending().stop()
+        await get_counter_buffer().stop()
+        app.state.mongo_client.close()
+        shutdown_hashing_pool()
+
 
+# nothing here reads the settings, they are loaded by the lifespan and on the first request
+app = FastAPI(lifespan=lifespan, default_response_class=BSONResponse)
 
-app = FastAPI()
+# both read their settings on the first request and pass requests through when disabled
+app.add_middleware(RateLimitMiddleware)
+# added last so it is the outermost middleware and also times rate limited requests
+app.add_middleware(InstrumentationMiddleware)
 
 
 app.include_router(api_router)
@@ -1,6 +1,25 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+
+EXCERPT_LENGTH = 200
+
+# fields a client may select with `fields=`, _id and created_at are always returned
+BLOG_LIST_FIELDS = ("title", "excerpt", "likes", "dislikes", "comments", "created_at", "created_by", "author_id")
+BLOG_DETAIL_FIELDS = BLOG_LIST_FIELDS + ("content", "recent_comments")
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """
+    Leading part of the content cut at a word boundary, stored so listings never read `content`.
+    """
+    content = " ".join(content.split())
+    if len(content) <= length:
+        return content
+    cut = content[:length].rsplit(" ", 1)[0] or content[:length]
+    return cut + "…"
 
 
 class ReactionTypeEnum(str, Enum):
@@ -16,11 +35,13 @@ class CreateBlogSchema(BaseModel):
 class BlogSchema(BaseModel):
     title: str
     content: str
+    excerpt: str = ""
     likes: int = 0
     dislikes: int = 0
     comments: int = 0
-    created_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
     created_by: str
+    author_id: str
 
 
 class BlogDetailResponseSchema(BlogSchema):
@@ -29,6 +50,7 @@ class BlogDetailResponseSchema(BlogSchema):
 
 class UserReactionSchema(BaseModel):
     user_id: str
+    author_id: str
     blog_id: str
     reaction_type: ReactionTypeEnum
 
@@ -36,3 +58,59 @@ class UserReactionSchema(BaseModel):
 class AddCommentSchema(BaseModel):
     comment: str
 
+
+class BulkCommentSchema(AddCommentSchema):
+    blog_id: str = Field(..., pattern=r"^[0-9a-f]{24}$")
+
+
+# backs the keyset pagination of blog listings, globally and per author
+BLOG_INDEXES = [
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    IndexModel(
+        [("created_by", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="created_by_created_at_id",
+    ),
+    # GET /users/{author_id}/blogs
+    IndexModel(
+        [("author_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="author_id_created_at_id",
+    ),
+    # GET /blogs/search, a title match ranks well above a content match
+    IndexModel(
+        [("title", TEXT), ("content", TEXT)],
+        weights={"title": 10, "content": 1},
+        name="title_content_text",
+    ),
+]
+
+# comment listing of a single blog, newest first
+COMMENT_INDEXES = [
+    IndexModel(
+        [("blog_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="blog_id_created_at_id",
+    ),
+]
+
+# GET /blogs/trending pages through trending_blogs by score
+TRENDING_INDEXES = [
+    IndexModel([("score", DESCENDING), ("_id", DESCENDING)], name="score_id"),
+]
+
+# delete jobs are claimed by due time, finished ones expire after a week
+DELETE_JOB_INDEXES = [
+    IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+    IndexModel([("finished_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600, name="finished_at_ttl"),
+]
+
+# a user reacts at most once per blog, reactions from before author ids are left out
+# until app.db.author_ids has backfilled them
+USER_REACTION_INDEXES = [
+    IndexModel(
+        [("blog_id", ASCENDING), ("author_id", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"author_id": {"$exists": True}},
+        name="blog_id_author_id_unique",
+    ),
+    # the cascade of a blog delete
+    IndexModel([("blog_id", ASCENDING)], name="blog_id"),
+]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
+from pymongo import ASCENDING, IndexModel
 
 class UserSchema(BaseModel):
     name: str
@@ -7,9 +8,16 @@ class UserSchema(BaseModel):
 
 
 class AuthUser(BaseModel):
+    # stable id of the user document, the name can change
     user_id: str
+    name: str
 
 
 class UserLoginSchema(BaseModel):
     email: EmailStr = Field(...)
-    password: str = Field(...)
\ No newline at end of file
+    password: str = Field(...)
+
+
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+]
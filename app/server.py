@@ -0,0 +1,96 @@
+"""
+Production entrypoint, runs the app on uvicorn workers with uvloop and httptools.
+
+    python -m app.server [--workers N] [--host HOST] [--port PORT]
+
+Defaults come from the SERVER_* settings. The app is imported once in the
+supervisor before the workers are spawned, so a broken import fails the launch
+instead of every worker, and the import time is part of the startup report each
+worker logs (and serves under `startup` on /health). On SIGTERM the workers stop
+accepting connections, give in-flight requests SERVER_GRACEFUL_SHUTDOWN_SECONDS
+to finish and then run the lifespan shutdown, which flushes the buffered counters
+and the pending trending updates.
+"""
+import argparse
+import copy
+import importlib
+import os
+import sys
+import time
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+from app.config import get_settings
+from app.core.startup import LAUNCHED_AT_ENV, PRELOAD_SECONDS_ENV
+
+
+APP = "app.main:app"
+
+
+def log_config() -> dict:
+    """
+    uvicorn's logging plus the app loggers, for the startup reports and the request log lines.
+    """
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["loggers"]["app"] = {"handlers": ["default"], "level": "INFO", "propagate": False}
+    return config
+
+
+def worker_count(requested: int) -> int:
+    return requested if requested > 0 else os.cpu_count() or 1
+
+
+def worker_pool_sizes(workers: int) -> dict:
+    """
+    Mongo pool settings for each worker, MONGO_TOTAL_MAX_POOL_SIZE split evenly when it is set.
+    Shares are rounded down so the workers stay within the total, but never go below one.
+    """
+    settings = get_settings()
+    if settings.MONGO_TOTAL_MAX_POOL_SIZE <= 0:
+        return {}
+    max_pool_size = max(1, settings.MONGO_TOTAL_MAX_POOL_SIZE // workers)
+    return {
+        "MONGO_MAX_POOL_SIZE": max_pool_size,
+        "MONGO_MIN_POOL_SIZE": min(settings.MONGO_MIN_POOL_SIZE, max_pool_size),
+    }
+
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.server")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args(argv)
+    workers = worker_count(args.workers)
+
+    os.environ[LAUNCHED_AT_ENV] = repr(time.time())
+    # workers are spawned and read their settings from the environment again
+    for name, value in worker_pool_sizes(workers).items():
+        os.environ[name] = str(value)
+
+    started = time.perf_counter()
+    module, _, attribute = APP.partition(":")
+    app = getattr(importlib.import_module(module), attribute)
+    os.environ[PRELOAD_SECONDS_ENV] = repr(time.perf_counter() - started)
+
+    uvicorn.run(
+        # uvicorn needs an import string to start several workers
+        APP if workers > 1 else app,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        log_config=log_config(),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,8 @@
+import asyncio
+import json
+import re
+import time
+
 
 def test_create_blog(client):
     r = client.post(
@@ -27,6 +32,11 @@ def test_create_blog(client):
     assert data["title"] == "Test Blog"
     assert data["content"] == "Test blog content"
 
+    # TEST: Conditional get of a single blog
+    etag = r.headers["etag"]
+    r = client.get(f"/blogs/{blog_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
     # TEST: Update a blog
     client.put(
         f"/blogs/{blog_id}",
@@ -36,7 +46,8 @@ def test_create_blog(client):
         }
     )
     
-    updated_blog = client.get(f"/blogs/{blog_id}")
+    updated_blog = client.get(f"/blogs/{blog_id}", headers={"If-None-Match": etag})
+    assert updated_blog.status_code == 200
     data = updated_blog.json()
     assert data["title"] == "Updated title"
     assert data["content"] == "Updated blog content"
@@ -50,6 +61,28 @@ def test_create_blog(client):
     assert len(data) == 0
 
 
+def test_legacy_blog_ownership(client):
+    from datetime import datetime
+    from app.config import get_settings
+
+    # written before blogs carried author ids
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    result = client.portal.call(mongo_db.blogs.insert_one, {
+        "title": "Legacy",
+        "content": "Legacy content",
+        "created_by": "test user",
+        "created_at": datetime.now(),
+    })
+    blog_id = str(result.inserted_id)
+
+    # TEST: Nobody owns a blog without an author id
+    r = client.put(f"/blogs/{blog_id}", json={"title": "Taken", "content": "Taken"})
+    assert r.status_code == 403
+    r = client.delete(f"/blogs/{blog_id}")
+    assert r.status_code == 403
+    assert client.get(f"/blogs/{blog_id}").json()["title"] == "Legacy"
+
+
 
 def test_user_reactions(client):
     r = client.post(
@@ -106,6 +139,24 @@ def test_user_reactions(client):
     data = blog.json()
     assert data["dislikes"] == 0
 
+    # TEST: Reacting twice with the same reaction
+    client.post(f"/blogs/{blog_id}/likes")
+    r = client.post(f"/blogs/{blog_id}/likes")
+    assert r.status_code == 400
+
+    # TEST: Switching Like to Dislike
+    r = client.post(f"/blogs/{blog_id}/dislikes")
+    assert r.status_code == 200
+
+    blog = client.get(f"/blogs/{blog_id}")
+    data = blog.json()
+    assert data["likes"] == 0
+    assert data["dislikes"] == 1
+
+    # TEST: Reacting to a missing blog
+    r = client.post("/blogs/000000000000000000000000/likes")
+    assert r.status_code == 400
+
 
 def test_user_comments(client):
     r = client.post(
@@ -150,4 +201,537 @@ def test_user_comments(client):
     assert r.status_code == 204
     all_comments = client.get(f"/blogs/{blog_id}/comments")
     data = all_comments.json()
-    assert len(data) == 0
\ No newline at end of file
+    assert len(data) == 0
+
+def test_blogs_cursor_pagination(client):
+    for i in range(5):
+        client.post(
+            "/blogs",
+            json={
+                "title": f"Test Blog {i}",
+                "content": "Test blog content",
+            }
+        )
+
+    # TEST: Walk all blogs with the cursor
+    titles = []
+    cursor = None
+    while True:
+        params = {"per_page": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        r = client.get("/blogs", params=params)
+        assert r.status_code == 200
+        titles += [blog["title"] for blog in r.json()["data"]]
+        cursor = r.json()["pagination"]["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == [f"Test Blog {i}" for i in reversed(range(5))]
+
+    # TEST: Totals
+    r = client.get("/blogs", params={"per_page": 2})
+    pagination = r.json()["pagination"]
+    assert pagination["total_count"] == 5
+    assert pagination["total_pages"] == 3
+
+    r = client.get("/blogs", params={"per_page": 2, "include_total": False})
+    pagination = r.json()["pagination"]
+    assert pagination["total_count"] is None
+
+    # TEST: Invalid cursor
+    r = client.get("/blogs", params={"cursor": "not a cursor"})
+    assert r.status_code == 400
+
+
+def test_blog_fields(client):
+    r = client.post(
+        "/blogs",
+        json={
+            "title": "Test Blog",
+            "content": "Test blog content " * 50,
+        }
+    )
+    blog_id = r.json()["_id"]
+
+    # TEST: Listings carry an excerpt instead of the content
+    r = client.get("/blogs")
+    data = r.json()["data"]
+    assert "content" not in data[0]
+    assert data[0]["excerpt"].startswith("Test blog content")
+    assert len(data[0]["excerpt"]) < len("Test blog content " * 50)
+
+    # TEST: Select fields of a listing
+    r = client.get("/blogs", params={"fields": "title,likes"})
+    data = r.json()["data"]
+    assert set(data[0]) == {"_id", "created_at", "title", "likes"}
+
+    # TEST: Select fields of a single blog
+    r = client.get(f"/blogs/{blog_id}", params={"fields": "title"})
+    assert r.json() == {"_id": blog_id, "title": "Test Blog"}
+
+    # TEST: Unknown field
+    r = client.get("/blogs", params={"fields": "password"})
+    assert r.status_code == 400
+
+
+def test_export(client):
+    blog_ids = []
+    for i in range(3):
+        r = client.post(
+            "/blogs",
+            json={
+                "title": f"Test Blog {i}",
+                "content": "Test blog content",
+            }
+        )
+        blog_ids.append(r.json()["_id"])
+    client.post(
+        f"/blogs/{blog_ids[0]}/comments",
+        json={
+            "comment": "test comment"
+        }
+    )
+
+    # TEST: Export blogs
+    r = client.get("/blogs/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["_id"] for line in lines] == blog_ids
+
+    # TEST: Export blogs created since the last one
+    r = client.get("/blogs/export", params={"since": lines[-1]["created_at"]})
+    assert [json.loads(line)["_id"] for line in r.text.splitlines()] == blog_ids[-1:]
+
+    # TEST: Export comments
+    r = client.get(f"/blogs/{blog_ids[0]}/comments/export")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["comment"] == "test comment"
+
+
+def test_bulk_ingest(client):
+    # TEST: Bulk create blogs, one of them invalid
+    r = client.post(
+        "/blogs/bulk",
+        json=[
+            {"title": "Test Blog 1", "content": "Test blog content"},
+            {"title": "Test Blog 2"},
+            {"title": "Test Blog 3", "content": "Test blog content"},
+        ]
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [result["status"] for result in data["results"]] == ["created", "error", "created"]
+    blog_id = data["results"][0]["_id"]
+
+    r = client.get("/blogs")
+    assert r.json()["pagination"]["total_count"] == 2
+
+    # TEST: Bulk add comments as NDJSON
+    lines = [
+        json.dumps({"blog_id": blog_id, "comment": "test comment 1"}),
+        json.dumps({"blog_id": blog_id, "comment": "test comment 2"}),
+        json.dumps({"blog_id": "000000000000000000000000", "comment": "test comment 3"}),
+    ]
+    r = client.post(
+        "/blogs/comments/bulk",
+        content="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+
+    r = client.get(f"/blogs/{blog_id}")
+    assert r.json()["comments"] == 2
+
+
+def test_bulk_body_limit(client, monkeypatch):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "BULK_MAX_ITEMS", 10)
+    monkeypatch.setattr(get_settings(), "BULK_MAX_ITEM_BYTES", 100)
+    blogs = [{"title": f"Blog {i}", "content": "content " * 20} for i in range(8)]
+
+    # TEST: A body over the byte cap is refused from its Content-Length
+    r = client.post("/blogs/bulk", json=blogs)
+    assert r.status_code == 413
+    assert r.json()["detail"] == "At most 1000 bytes per request."
+
+    # TEST: Without a Content-Length the body is refused once the cap is crossed
+    def chunks():
+        for blog in blogs:
+            yield (json.dumps(blog) + "\n").encode()
+
+    r = client.post("/blogs/bulk", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 413
+
+    # TEST: Bodies within the cap go through
+    r = client.post("/blogs/bulk", json=blogs[:3])
+    assert r.status_code == 200
+    assert r.json()["created"] == 3
+
+
+def test_comment_paging_and_preview(client):
+    blog_ids = []
+    for i in range(2):
+        r = client.post(
+            "/blogs",
+            json={
+                "title": f"Test Blog {i}",
+                "content": "Test blog content",
+            }
+        )
+        blog_ids.append(r.json()["_id"])
+    for i in range(5):
+        client.post(
+            f"/blogs/{blog_ids[0]}/comments",
+            json={
+                "comment": f"test comment {i}"
+            }
+        )
+
+    # TEST: Comments of another blog are not listed
+    r = client.get(f"/blogs/{blog_ids[1]}/comments")
+    assert r.status_code == 200
+    assert r.json() == []
+
+    # TEST: Walk comments with the cursor
+    comments = []
+    params = {"per_page": 2}
+    while True:
+        r = client.get(f"/blogs/{blog_ids[0]}/comments", params=params)
+        comments += [comment["comment"] for comment in r.json()]
+        if "x-next-cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["x-next-cursor"]
+    assert comments == [f"test comment {i}" for i in reversed(range(5))]
+
+    # TEST: Blog detail embeds the latest comments
+    r = client.get(f"/blogs/{blog_ids[0]}")
+    preview = [comment["comment"] for comment in r.json()["recent_comments"]]
+    assert preview == ["test comment 4", "test comment 3", "test comment 2"]
+
+
+def test_trending(client):
+    from app.db.trending import get_trending
+
+    blog_ids = [
+        client.post("/blogs", json={"title": f"Blog {i}", "content": "content"}).json()["_id"]
+        for i in range(3)
+    ]
+    client.post(f"/blogs/{blog_ids[0]}/likes")
+    for comment in ("first", "second"):
+        client.post(f"/blogs/{blog_ids[1]}/comments", json={"comment": comment})
+    client.portal.call(get_trending().refresh)
+
+    # TEST: Blogs ranked by engagement, blogs without any are left out
+    r = client.get("/blogs/trending", params={"per_page": 1})
+    assert r.status_code == 200
+    body = r.json()
+    assert [blog["_id"] for blog in body["data"]] == [blog_ids[1]]
+    assert body["data"][0]["comments"] == 2
+
+    r = client.get("/blogs/trending", params={"per_page": 1, "cursor": body["pagination"]["next_cursor"]})
+    body = r.json()
+    assert [blog["_id"] for blog in body["data"]] == [blog_ids[0]]
+    assert body["pagination"]["next_cursor"] is None
+
+    # TEST: A deleted blog leaves the feed
+    client.delete(f"/blogs/{blog_ids[1]}")
+    client.portal.call(get_trending().refresh)
+    r = client.get("/blogs/trending")
+    assert [blog["_id"] for blog in r.json()["data"]] == [blog_ids[0]]
+
+
+def test_search(client):
+    import pytest
+    from app.api.routes.blogs import _highlight, _search_terms
+    from app.config import get_settings
+
+    # TEST: Terms are matched on the raw text, never inside the escaped entities
+    pattern = re.compile("amp|lt|x27|python", re.IGNORECASE)
+    assert _highlight("Python & <lt> 'amp'", pattern) == (
+        "<mark>Python</mark> &amp; &lt;<mark>lt</mark>&gt; &#x27;<mark>amp</mark>&#x27;"
+    )
+    assert _highlight("a < b", None) == "a &lt; b"
+    assert _search_terms('"fast api" python -java') == ["fast api", "python"]
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    try:
+        client.portal.call(lambda: mongo_db.blogs.find({"$text": {"$search": "probe"}}).to_list(length=1))
+    except Exception:
+        pytest.skip("the Mongo backend has no $text support")
+
+    padding = "filler words " * 20
+    client.post("/blogs", json={"title": "Python & friends", "content": padding + "python python python, amp & more"})
+    client.post("/blogs", json={"title": "Cooking", "content": "a single python recipe"})
+    client.post("/blogs", json={"title": "Python in the title only", "content": "nothing to see here"})
+    client.post("/blogs", json={"title": "Gardening", "content": "no match at all"})
+
+    # TEST: Best matches come first
+    r = client.get("/blogs/search", params={"q": "python amp"})
+    assert r.status_code == 200
+    data = r.json()["data"]
+    assert len(data) == 3
+    assert data[0]["title"] == "Python & friends"
+    scores = [blog["score"] for blog in data]
+    assert scores == sorted(scores, reverse=True)
+
+    # TEST: Snippets are cut around the first term and highlighted
+    highlights = data[0]["highlights"]
+    assert highlights["title"] == "<mark>Python</mark> &amp; friends"
+    assert "<mark>python</mark> <mark>python</mark>" in highlights["snippet"]
+    assert "<mark>amp</mark> &amp; more" in highlights["snippet"]
+    assert not highlights["snippet"].startswith("filler words filler")
+
+    # TEST: Blogs matching on the title only fall back to the excerpt
+    title_only = next(blog for blog in data if blog["title"] == "Python in the title only")
+    assert title_only["highlights"]["snippet"] == title_only["excerpt"] == "nothing to see here"
+
+    # TEST: next_cursor pages through the same ranking
+    paged, cursor = [], None
+    while True:
+        params = {"q": "python amp", "per_page": 1}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = client.get("/blogs/search", params=params).json()
+        paged += [blog["_id"] for blog in page["data"]]
+        cursor = page["pagination"]["next_cursor"]
+        if cursor is None:
+            break
+    assert paged == [blog["_id"] for blog in data]
+
+
+def test_delete_cascade(client):
+    from app.db.cascade import get_cascade_deleter
+
+    blog_id = client.post("/blogs", json={"title": "Blog", "content": "content"}).json()["_id"]
+    for i in range(3):
+        client.post(f"/blogs/{blog_id}/comments", json={"comment": f"comment {i}"})
+    client.post(f"/blogs/{blog_id}/likes")
+
+    # TEST: The blog is gone right away, its comments and reactions follow
+    r = client.delete(f"/blogs/{blog_id}")
+    assert r.status_code == 204
+    assert client.get(f"/blogs/{blog_id}").status_code == 400
+    # the worker of the app may hold the job, wait for it rather than racing it
+    for _ in range(100):
+        client.portal.call(get_cascade_deleter().run_once)
+        r = client.get(f"/blogs/{blog_id}/comments")
+        if r.status_code == 400:
+            break
+        time.sleep(0.05)
+    assert r.status_code == 400
+    assert client.delete(f"/blogs/{blog_id}/likes").status_code == 400
+
+    # TEST: A request that died after writing the job still gets its blog deleted
+    from bson import ObjectId
+    from app.config import get_settings
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    blog_id = client.post("/blogs", json={"title": "Blog", "content": "content"}).json()["_id"]
+    client.post(f"/blogs/{blog_id}/comments", json={"comment": "comment"})
+    client.portal.call(get_cascade_deleter().enqueue, mongo_db, ObjectId(blog_id))
+    for _ in range(100):
+        client.portal.call(get_cascade_deleter().run_once)
+        r = client.get(f"/blogs/{blog_id}/comments")
+        if r.status_code == 400:
+            break
+        time.sleep(0.05)
+    assert r.status_code == 400
+    assert client.get(f"/blogs/{blog_id}").status_code == 400
+
+
+def test_rate_limit(client):
+    from app.auth.auth_handler import sign_jwt
+    from app.config import get_settings
+
+    blog_id = client.post("/blogs", json={"title": "Blog", "content": "content"}).json()["_id"]
+    for i in range(get_settings().RATE_LIMIT_COMMENTS_BURST):
+        r = client.post(f"/blogs/{blog_id}/comments", json={"comment": f"comment {i}"})
+        assert r.status_code == 200
+
+    # TEST: Writes beyond the burst are turned away
+    r = client.post(f"/blogs/{blog_id}/comments", json={"comment": "one too many"})
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+
+    # TEST: Reads and other write routes have their own budget
+    assert client.get(f"/blogs/{blog_id}/comments").status_code == 200
+    assert client.post(f"/blogs/{blog_id}/likes").status_code == 200
+
+    # TEST: Made-up tokens do not get buckets of their own
+    for i in range(3):
+        r = client.post(
+            f"/blogs/{blog_id}/comments", json={"comment": "rotated"}, headers={"Authorization": f"Bearer made-up-{i}"},
+        )
+        assert r.status_code == 429
+
+    # TEST: Buckets follow the user, a new login does not refill them
+    first = {"Authorization": "Bearer " + sign_jwt("test@example.com", "test user", "66408bcd87e2e3971500ce0c")["access_token"]}
+    for i in range(get_settings().RATE_LIMIT_COMMENTS_BURST):
+        r = client.post(f"/blogs/{blog_id}/comments", json={"comment": f"signed {i}"}, headers=first)
+        assert r.status_code == 200
+    time.sleep(0.01)
+    second = {"Authorization": "Bearer " + sign_jwt("test@example.com", "test user", "66408bcd87e2e3971500ce0c")["access_token"]}
+    assert second != first
+    assert client.post(f"/blogs/{blog_id}/comments", json={"comment": "relogin"}, headers=second).status_code == 429
+
+    # TEST: Bulk writes are limited per request, whatever their number of items
+    items = [{"blog_id": blog_id, "comment": f"bulk comment {i}"} for i in range(20)]
+    for _ in range(get_settings().RATE_LIMIT_BULK_BURST):
+        assert client.post("/blogs/comments/bulk", json=items).status_code == 200
+    r = client.post("/blogs/comments/bulk", json=items[:1])
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+    assert client.post("/blogs/bulk", json=[{"title": "Bulk", "content": "content"}]).status_code == 429
+
+
+def test_metrics(client):
+    r = client.post("/blogs", json={"title": "Timed", "content": "Timed content"})
+    assert r.status_code == 200
+    blog_id = r.json()["_id"]
+
+    # TEST: Mongo time and round trips are reported per response
+    r = client.get(f"/blogs/{blog_id}")
+    assert r.status_code == 200
+    assert "round trips" in r.headers["server-timing"]
+
+    # TEST: Per-route histograms are exposed in the Prometheus text format
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/blogs/{blog_id}"}' in r.text
+    assert "http_request_mongo_round_trips_bucket" in r.text
+
+
+def test_concurrent_writes(client, monkeypatch):
+    from app.config import get_settings
+
+    r = client.post("/blogs", json={"title": "Concurrent", "content": "Concurrent content"})
+    assert r.status_code == 200
+    blog_id = r.json()["_id"]
+
+    # simulated network delay on every Mongo operation the comment routes use
+    delay = 0.1
+    collection_class = type(client.app.state.mongo_client[get_settings().MONGO_DB].blogs)
+
+    def delayed(name):
+        original = getattr(collection_class, name)
+
+        async def method(self, *args, **kwargs):
+            await asyncio.sleep(delay)
+            return await original(self, *args, **kwargs)
+        return method
+
+    for name in ("find_one", "insert_one", "update_one", "find_one_and_delete"):
+        monkeypatch.setattr(collection_class, name, delayed(name))
+
+    # TEST: after the blog check the comment insert and preview update overlap, 2 delays instead of 3
+    started = time.perf_counter()
+    r = client.post(f"/blogs/{blog_id}/comments", json={"comment": "Concurrent comment"})
+    elapsed = time.perf_counter() - started
+    assert r.status_code == 200
+    assert elapsed < 3 * delay
+
+    # TEST: a comment on a missing blog is rejected and never written
+    missing_id = "66408bcd87e2e3971500ce0c"
+    r = client.post(f"/blogs/{missing_id}/comments", json={"comment": "Lost comment"})
+    assert r.status_code == 400
+    monkeypatch.undo()
+    assert client.get(f"/blogs/{missing_id}/comments").status_code == 400
+    r = client.get(f"/blogs/{blog_id}/comments")
+    assert [comment["comment"] for comment in r.json()] == ["Concurrent comment"]
+
+    # TEST: errors propagate out of the task group unwrapped
+    async def fail():
+        raise ValueError("failed")
+
+    async def concurrently():
+        from app.core.concurrency import gather
+        try:
+            await gather(lambda: asyncio.sleep(1), fail)
+        except ValueError:
+            return True
+        return False
+
+    started = time.perf_counter()
+    assert client.portal.call(concurrently)
+    # the sleeping sibling was cancelled
+    assert time.perf_counter() - started < 0.5
+
+
+def test_retired_reaction_index(client):
+    from app.api.deps import get_current_user
+    from app.config import get_settings
+    from app.db.indexes import ensure_indexes
+    from app.models.users import AuthUser
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    r = client.post("/blogs", json={"title": "Shared names", "content": "Shared names content"})
+    blog_id = r.json()["_id"]
+
+    async def create_legacy_index():
+        await mongo_db.user_reactions.create_index(
+            [("blog_id", 1), ("user_id", 1)], unique=True, name="blog_id_user_id_unique",
+        )
+    client.portal.call(create_legacy_index)
+
+    override = client.app.dependency_overrides[get_current_user]
+    try:
+        # TEST: a duplicate on the display name index is rejected instead of counted
+        client.app.dependency_overrides[get_current_user] = lambda: AuthUser(user_id="66408bcd87e2e3971500ce0d", name="Alex")
+        assert client.post(f"/blogs/{blog_id}/likes").status_code == 200
+        client.app.dependency_overrides[get_current_user] = lambda: AuthUser(user_id="66408bcd87e2e3971500ce0e", name="Alex")
+        assert client.post(f"/blogs/{blog_id}/likes").status_code == 409
+        assert client.get(f"/blogs/{blog_id}").json()["likes"] == 1
+
+        # TEST: ensure_indexes drops the retired index
+        client.portal.call(ensure_indexes, mongo_db)
+        assert client.post(f"/blogs/{blog_id}/likes").status_code == 200
+        assert client.get(f"/blogs/{blog_id}").json()["likes"] == 2
+        assert client.delete(f"/blogs/{blog_id}/likes").status_code == 204
+    finally:
+        client.app.dependency_overrides[get_current_user] = override
+
+    # TEST: another worker dropping the retired index first does not fail the startup
+    from pymongo.errors import OperationFailure
+
+    client.portal.call(create_legacy_index)
+    collection_class = type(mongo_db.user_reactions)
+    drop_index = collection_class.drop_index
+
+    async def dropped_elsewhere(self, name, *args, **kwargs):
+        await drop_index(self, name, *args, **kwargs)
+        raise OperationFailure("index not found with name [%s]" % name, code=27)
+
+    collection_class.drop_index = dropped_elsewhere
+    try:
+        client.portal.call(ensure_indexes, mongo_db)
+    finally:
+        collection_class.drop_index = drop_index
+    assert "blog_id_user_id_unique" not in client.portal.call(mongo_db.user_reactions.index_information)
+
+
+
+def test_explain_query_shapes(client):
+    import pytest
+    from app.config import get_settings
+    from app.db.indexes import ensure_indexes, explain_query_shapes
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    client.portal.call(ensure_indexes, mongo_db)
+    try:
+        results = client.portal.call(explain_query_shapes, mongo_db)
+    except Exception:
+        pytest.skip("the Mongo backend does not explain queries")
+    results = {result["query"]: result for result in results}
+
+    # TEST: Every query shape is served by an index, without sorting in memory
+    assert not [name for name, result in results.items() if result["collection_scan"] or result["in_memory_sort"]]
+    assert results["comments.by_blog"]["indexes"] == ["blog_id_created_at_id"]
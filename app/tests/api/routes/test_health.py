@@ -0,0 +1,28 @@
+def test_health(client):
+    # TEST: Ready with Mongo reachable, reporting the pools and caches of this process
+    r = client.get("/health")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+    assert {"pools", "max_pool_size", "read_preference"} <= set(body["mongo"])
+    assert {"principals", "response_cache", "counter_buffer", "rate_limit", "startup"} <= set(body)
+
+
+def test_health_degraded(client, monkeypatch):
+    from pymongo.errors import ServerSelectionTimeoutError
+
+    admin = client.app.state.mongo_client.admin
+
+    async def unreachable(*args, **kwargs):
+        raise ServerSelectionTimeoutError("no servers available")
+
+    monkeypatch.setattr(type(admin), "command", unreachable)
+
+    # TEST: A failed ping is reported as unavailable
+    r = client.get("/health")
+    assert r.status_code == 503
+    assert r.json()["detail"] == "Database is not reachable."
+
+    # TEST: Healthy again once the ping succeeds
+    monkeypatch.undo()
+    assert client.get("/health").status_code == 200
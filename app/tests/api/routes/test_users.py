@@ -0,0 +1,206 @@
+
+def test_signup_and_login(client):
+    # TEST: Signup
+    r = client.post(
+        "/users/user/signup",
+        json={
+            "name": "Test User",
+            "email": "test@example.com",
+            "password": "test password",
+        }
+    )
+    assert r.status_code == 200
+    assert "access_token" in r.json()
+
+    # TEST: Signup with an existing email
+    r = client.post(
+        "/users/user/signup",
+        json={
+            "name": "Test User",
+            "email": "test@example.com",
+            "password": "test password",
+        }
+    )
+    assert r.status_code == 409
+
+    # TEST: Login with a wrong password
+    r = client.post(
+        "/users/user/login",
+        json={
+            "email": "test@example.com",
+            "password": "wrong password",
+        }
+    )
+    assert r.status_code == 401
+
+    # TEST: Login
+    r = client.post(
+        "/users/user/login",
+        json={
+            "email": "test@example.com",
+            "password": "test password",
+        }
+    )
+    assert r.status_code == 200
+    assert "access_token" in r.json()
+
+
+
+def test_concurrent_signup(client, monkeypatch):
+    from app.config import get_settings
+    from app.db.indexes import ensure_indexes
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    client.portal.call(ensure_indexes, mongo_db)
+    signup = {"name": "Test User", "email": "race@example.com", "password": "test password"}
+    assert client.post("/users/user/signup", json=signup).status_code == 200
+
+    # the other signup passed the existence check before this one inserted
+    async def not_found(self, *args, **kwargs):
+        return None
+
+    monkeypatch.setattr(type(mongo_db.users), "find_one", not_found)
+
+    # TEST: The unique email index turns the second insert into the same 409
+    r = client.post("/users/user/signup", json=signup)
+    assert r.status_code == 409
+    assert r.json()["detail"] == "User already exists!"
+
+
+def test_author_blogs(client):
+    author_id = "66408bcd87e2e3971500ce0c"
+    for i in range(3):
+        client.post("/blogs", json={"title": f"Blog {i}", "content": "content"})
+
+    # TEST: Newest first, paged by cursor
+    r = client.get(f"/users/{author_id}/blogs", params={"per_page": 2})
+    assert r.status_code == 200
+    body = r.json()
+    assert [blog["title"] for blog in body["data"]] == ["Blog 2", "Blog 1"]
+    assert all(blog["author_id"] == author_id for blog in body["data"])
+
+    r = client.get(f"/users/{author_id}/blogs", params={"per_page": 2, "cursor": body["pagination"]["next_cursor"]})
+    assert [blog["title"] for blog in r.json()["data"]] == ["Blog 0"]
+
+    # TEST: A new blog of the author shows up on the cached first page
+    client.post("/blogs", json={"title": "Blog 3", "content": "content"})
+    r = client.get(f"/users/{author_id}/blogs", params={"per_page": 2})
+    assert [blog["title"] for blog in r.json()["data"]] == ["Blog 3", "Blog 2"]
+
+    # TEST: Other authors have their own listing
+    r = client.get("/users/000000000000000000000000/blogs")
+    assert r.json()["data"] == []
+
+
+def test_login_rehashes_outdated_hash(client):
+    from passlib.hash import bcrypt
+    from app.config import get_settings
+
+    settings = get_settings()
+    mongo_db = client.app.state.mongo_client[settings.MONGO_DB]
+    weak_hash = bcrypt.using(rounds=4).hash("test password")
+    client.portal.call(mongo_db.users.insert_one, {
+        "name": "Old User",
+        "email": "old@example.com",
+        "password": weak_hash,
+    })
+
+    # TEST: A hash made with fewer rounds still logs in and is replaced
+    r = client.post("/users/user/login", json={"email": "old@example.com", "password": "test password"})
+    assert r.status_code == 200
+    stored = client.portal.call(mongo_db.users.find_one, {"email": "old@example.com"})["password"]
+    assert stored != weak_hash
+    assert stored.split("$")[2] == "%02d" % settings.BCRYPT_ROUNDS
+
+    # TEST: The new hash is kept on the next login
+    r = client.post("/users/user/login", json={"email": "old@example.com", "password": "test password"})
+    assert r.status_code == 200
+    assert client.portal.call(mongo_db.users.find_one, {"email": "old@example.com"})["password"] == stored
+
+
+def test_hashing_pool_saturated(client, monkeypatch):
+    import threading
+    import time
+    from app.auth import hashing
+    from app.config import get_settings
+
+    client.post("/users/user/signup", json={"name": "Busy", "email": "busy@example.com", "password": "test password"})
+
+    # every verification blocks until released, the queue takes no waiting request
+    release = threading.Event()
+
+    def blocked(plain_password, hashed_password):
+        release.wait(5)
+        return False, None
+
+    monkeypatch.setattr(hashing, "verify_and_update_password", blocked)
+    monkeypatch.setattr(get_settings(), "HASHING_QUEUE_LIMIT", 0)
+    capacity = get_settings().HASHING_MAX_WORKERS
+    pending = [client.portal.start_task_soon(hashing.check_password, "password", "hash") for _ in range(capacity)]
+    try:
+        for _ in range(100):
+            if hashing._in_flight == capacity:
+                break
+            time.sleep(0.01)
+        assert hashing._in_flight == capacity
+
+        # TEST: Logins beyond the pool capacity are turned away right away
+        r = client.post("/users/user/login", json={"email": "busy@example.com", "password": "test password"})
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+    finally:
+        release.set()
+        for future in pending:
+            future.result()
+
+    # TEST: The pool takes logins again once it drains
+    monkeypatch.undo()
+    r = client.post("/users/user/login", json={"email": "busy@example.com", "password": "test password"})
+    assert r.status_code == 200
+
+
+def test_current_user_resolution(client):
+    import pytest
+    from fastapi import HTTPException
+    from app.api.deps import get_current_user, get_user_cache, principal_stats
+    from app.auth.auth_handler import sign_jwt, verify_jwt
+    from app.config import get_settings
+
+    mongo_db = client.app.state.mongo_client[get_settings().MONGO_DB]
+    r = client.post(
+        "/users/user/signup",
+        json={"name": "Test User", "email": "test@example.com", "password": "test password"},
+    )
+    signed_up = verify_jwt(r.json()["access_token"])
+    get_user_cache().clear()
+
+    def resolve(token: str):
+        # the dependency itself, conftest overrides it for the routes
+        return client.portal.call(get_current_user, verify_jwt(token), mongo_db)
+
+    def counted(path: str, token: str):
+        before = dict(principal_stats)
+        user = resolve(token)
+        assert {name: principal_stats[name] - before[name] for name in before} == {
+            name: int(name == path) for name in before
+        }
+        return user
+
+    # TEST: Tokens carrying the name and uid need no lookup
+    user = counted("from_token", r.json()["access_token"])
+    assert (user.user_id, user.name) == (signed_up["uid"], "Test User")
+
+    # TEST: Older tokens are resolved from the database once, then from the cache
+    legacy_token = sign_jwt("test@example.com")["access_token"]
+    user = counted("from_db", legacy_token)
+    assert (user.user_id, user.name) == (signed_up["uid"], "Test User")
+    user = counted("from_cache", legacy_token)
+    assert (user.user_id, user.name) == (signed_up["uid"], "Test User")
+
+    # TEST: Tokens of unknown users are rejected
+    before = principal_stats["from_db"]
+    with pytest.raises(HTTPException) as exc_info:
+        resolve(sign_jwt("nobody@example.com")["access_token"])
+    assert exc_info.value.status_code == 403
+    assert principal_stats["from_db"] == before + 1
+    assert get_user_cache().get("nobody@example.com") is None
@@ -1,9 +1,13 @@
+import asyncio
 from collections.abc import Generator
 
 from pymongo import MongoClient
 
 from app.api.deps import get_current_user
-from app.config import settings
+from app.config import get_settings
+from app.api.rate_limit import get_rate_limit_backend
+from app.api.response_cache import get_response_cache
+from app.db.counts import get_blog_counts
 from app.models.users import AuthUser
 import pytest
 from fastapi.testclient import TestClient
@@ -12,17 +16,13 @@ from app.main import app
 
 
 app.dependency_overrides = {
-    get_current_user: lambda: AuthUser(user_id="66408bcd87e2e3971500ce0c")
+    get_current_user: lambda: AuthUser(user_id="66408bcd87e2e3971500ce0c", name="test user")
 }
 
 @pytest.fixture(scope="session", autouse=True)
 def mongo_db() -> AsyncIOMotorDatabase:
-    ip = settings.MONGO_IP
-    port = settings.MONGO_PORT
-    username = settings.MONGO_USER
-    pwd = settings.MONGO_PWD
-    mongo_uri = "mongodb://" + str(ip) + ":" + str(port) + username + pwd
-    client = AsyncIOMotorClient(mongo_uri)
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongo_uri)
     return client[settings.MONGO_DB]
 
 
@@ -34,11 +34,10 @@ def client() -> Generator[TestClient, None, None]:
 
 @pytest.fixture(autouse=True)
 def clean_db():
-    ip = settings.MONGO_IP
-    port = settings.MONGO_PORT
-    username = settings.MONGO_USER
-    pwd = settings.MONGO_PWD
-    mongo_uri = "mongodb://" + str(ip) + ":" + str(port) + username + pwd
-    mongo_client = MongoClient(mongo_uri)
+    settings = get_settings()
+    mongo_client = MongoClient(settings.mongo_uri)
     if settings.MONGO_DB.startswith("test"):
         mongo_client.drop_database(settings.MONGO_DB)
+    get_blog_counts().clear()
+    asyncio.run(get_response_cache().backend.clear())
+    asyncio.run(get_rate_limit_backend().clear())
@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import hashlib
+from types import SimpleNamespace
+
+import jwt
+import orjson
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.auth import auth_handler
+from app.auth.auth_bearer import JWTBearer
+from app.auth.auth_handler import get_token_cache, verify_jwt
+from app.core import cache as cache_module
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    One hand-driven clock behind both the token "expires" checks and the cache expiry.
+    """
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(auth_handler, "time", SimpleNamespace(time=lambda: clock.now))
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    token_cache = get_token_cache()
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    yield clock
+    token_cache.clear()
+
+
+def make_token(clock, expires_in: float, secret: str = "secret", **claims) -> str:
+    return jwt.encode({"user_id": "user@test", "expires": clock.now + expires_in, **claims}, secret, algorithm="HS256")
+
+
+def test_cached_token_rejected_once_expired(clock):
+    token = make_token(clock, 60)
+    claims = verify_jwt(token)
+    assert claims["user_id"] == "user@test"
+    assert verify_jwt(token) == claims
+    assert get_token_cache().hits == 1
+
+    # an entry outliving its token, as one written with the full cache TTL would
+    get_token_cache().set(hashlib.sha256(token.encode()).digest(), claims)
+    clock.now += 61
+
+    # TEST: The cache hit is checked against "expires" and dropped
+    assert verify_jwt(token) is None
+    assert get_token_cache().hits == 2
+    assert len(get_token_cache()) == 0
+
+
+def test_cache_ttl_clamped_to_expiry(clock):
+    assert get_token_cache().ttl > 60
+    token = make_token(clock, 60)
+    assert verify_jwt(token) is not None
+
+    clock.now += 59
+    assert verify_jwt(token) is not None
+    assert get_token_cache().hits == 1
+
+    # TEST: The entry expires with the token rather than after the cache TTL
+    clock.now += 2
+    assert verify_jwt(token) is None
+    assert get_token_cache().misses == 2
+    assert len(get_token_cache()) == 0
+
+
+def test_invalid_tokens_not_cached(clock):
+    header, _, signature = make_token(clock, 60).split(".")
+    payload = base64.urlsafe_b64encode(orjson.dumps({"user_id": "admin@test", "expires": clock.now + 60}))
+    tampered = ".".join((header, payload.rstrip(b"=").decode(), signature))
+
+    # TEST: Tampered, foreign, garbage and incomplete tokens are rejected and never cached
+    for token in (
+        tampered,
+        make_token(clock, 60, secret="not the secret"),
+        "not a token",
+        make_token(clock, -1),
+        jwt.encode({"user_id": "user@test"}, "secret", algorithm="HS256"),
+        make_token(clock, 60)[:-2],
+    ):
+        assert verify_jwt(token) is None
+    assert len(get_token_cache()) == 0
+
+
+def test_bearer_keeps_claims_on_request(clock):
+    def request(token: str) -> Request:
+        return Request({
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"authorization", b"Bearer " + token.encode())],
+        })
+
+    token = make_token(clock, 60, name="test user")
+    valid = request(token)
+
+    # TEST: The verified claims are returned and kept on request.state
+    claims = asyncio.run(JWTBearer()(valid))
+    assert claims["name"] == "test user"
+    assert valid.state.jwt_claims == claims
+
+    # TEST: An invalid token is a 403 and leaves request.state alone
+    invalid = request("not a token")
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(JWTBearer()(invalid))
+    assert exc_info.value.status_code == 403
+    assert not hasattr(invalid.state, "jwt_claims")
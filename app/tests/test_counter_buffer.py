@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError, ServerSelectionTimeoutError
+
+from app.db.counter_buffer import CounterBuffer
+
+
+class FakeBlogs:
+    """
+    Stands in for the blogs collection, records every bulk write and fails the next one when told to.
+    """
+
+    def __init__(self):
+        self.writes = []
+        self.error = None
+
+    async def bulk_write(self, operations, ordered=True):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+        self.writes.append({operation._filter["_id"]: operation._doc["$inc"] for operation in operations})
+
+
+def run_with_buffer(test, max_pending=100):
+    async def run():
+        blogs = FakeBlogs()
+        buffer = CounterBuffer(flush_interval=3600, max_pending=max_pending)
+        buffer.start(blogs)
+        try:
+            await test(buffer, blogs)
+        finally:
+            blogs.error = None
+            await buffer.stop()
+    asyncio.run(run())
+
+
+def test_coalescing_and_apply_pending():
+    blog_id = ObjectId()
+
+    async def test(buffer, blogs):
+        buffer.add(blog_id, {"likes": 1})
+        buffer.add(blog_id, {"likes": 1, "dislikes": -1})
+        buffer.add(blog_id, {"comments": 1, "dislikes": 1})
+
+        # TEST: reads see the pending deltas, fields missing from the document are left out
+        document = {"_id": blog_id, "likes": 3, "dislikes": 0}
+        assert buffer.apply_pending(document) == {"_id": blog_id, "likes": 5, "dislikes": 0}
+
+        # TEST: deltas of a blog are written as one update, zero deltas are dropped
+        await buffer.flush()
+        assert blogs.writes == [{blog_id: {"likes": 2, "comments": 1}}]
+        assert buffer.pending_for(blog_id) == {}
+
+    run_with_buffer(test)
+
+
+def test_flush_at_max_pending():
+    async def test(buffer, blogs):
+        buffer.add(ObjectId(), {"likes": 1})
+        await asyncio.sleep(0)
+        assert blogs.writes == []
+
+        # TEST: reaching max_pending blogs starts a flush without waiting for the interval
+        buffer.add(ObjectId(), {"likes": 1})
+        await asyncio.sleep(0)
+        assert len(blogs.writes) == 1 and len(blogs.writes[0]) == 2
+
+    run_with_buffer(test, max_pending=2)
+
+
+def test_retry_after_failed_flush():
+    first, second = ObjectId(), ObjectId()
+
+    async def test(buffer, blogs):
+        # TEST: nothing was sent, the whole batch is retried
+        buffer.add(first, {"likes": 1})
+        blogs.error = ServerSelectionTimeoutError("no primary")
+        with pytest.raises(ServerSelectionTimeoutError):
+            await buffer.flush()
+        buffer.add(first, {"likes": 1})
+        await buffer.flush()
+        assert blogs.writes == [{first: {"likes": 2}}]
+
+        # TEST: only the operations with a write error are retried
+        buffer.add(first, {"likes": 1})
+        buffer.add(second, {"likes": 1})
+        blogs.error = BulkWriteError({"writeErrors": [{"index": 1, "code": 14, "errmsg": "type mismatch"}]})
+        with pytest.raises(BulkWriteError):
+            await buffer.flush()
+        assert buffer.pending_for(first) == {}
+        assert buffer.pending_for(second) == {"likes": 1}
+
+        # TEST: an unknown outcome drops the batch rather than risk applying it twice
+        blogs.error = AutoReconnect("connection reset")
+        with pytest.raises(AutoReconnect):
+            await buffer.flush()
+        assert buffer.pending_for(second) == {}
+        assert buffer.stats()["dropped_updates"] == 1
+        assert buffer.stats()["failed_flushes"] == 3
+
+    run_with_buffer(test)
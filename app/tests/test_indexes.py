@@ -0,0 +1,65 @@
+import asyncio
+from copy import deepcopy
+
+from bson import SON
+
+from app.db.indexes import COLLECTION_INDEXES, index_drift
+
+
+class FakeCollection:
+    def __init__(self, indexes: dict):
+        self.indexes = indexes
+
+    async def index_information(self):
+        return deepcopy(self.indexes)
+
+
+def server_indexes() -> dict:
+    """
+    The declared indexes the way index_information() reports them once created.
+    """
+    collections = {}
+    for collection, indexes in COLLECTION_INDEXES.items():
+        information = {"_id_": {"key": [("_id", 1)], "v": 2}}
+        for index in indexes:
+            document = dict(index.document)
+            name = document.pop("name")
+            if "weights" in document:
+                # text indexes come back as _fts/_ftsx keys
+                document["key"] = [("_fts", "text"), ("_ftsx", 1)]
+                document["weights"] = SON(document["weights"])
+            else:
+                document["key"] = list(document["key"].items())
+            information[name] = {"v": 2, **document}
+        collections[collection] = information
+    return collections
+
+
+def drift(collections: dict) -> dict:
+    mongo_db = {collection: FakeCollection(indexes) for collection, indexes in collections.items()}
+    return asyncio.run(index_drift(mongo_db))
+
+
+def test_index_drift():
+    collections = server_indexes()
+
+    # TEST: Indexes matching their declarations are no drift
+    assert drift(collections) == {}
+
+    collections["delete_jobs"]["finished_at_ttl"]["expireAfterSeconds"] = 60
+    collections["user_reactions"]["blog_id_author_id_unique"]["partialFilterExpression"] = {
+        "reaction_type": {"$exists": True},
+    }
+    collections["blogs"]["title_content_text"]["weights"] = SON([("title", 1), ("content", 1)])
+    del collections["comments"]["blog_id_created_at_id"]
+    collections["comments"]["user_id"] = {"v": 2, "key": [("user_id", 1)]}
+    collections["users"]["email_unique"].pop("unique")
+
+    # TEST: Changed TTLs, partial filters, weights and uniqueness, missing and extra indexes are reported
+    assert drift(collections) == {
+        "delete_jobs": {"missing": [], "changed": ["finished_at_ttl"], "extra": []},
+        "user_reactions": {"missing": [], "changed": ["blog_id_author_id_unique"], "extra": []},
+        "blogs": {"missing": [], "changed": ["title_content_text"], "extra": []},
+        "comments": {"missing": ["blog_id_created_at_id"], "changed": [], "extra": ["user_id"]},
+        "users": {"missing": [], "changed": ["email_unique"], "extra": []},
+    }
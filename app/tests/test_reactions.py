@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.db.reactions import _run_write
+
+
+class FakeSession:
+    """
+    Runs every transaction once, the way with_transaction does for non-transient errors.
+    """
+
+    def __init__(self):
+        self.transactions = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def with_transaction(self, write):
+        self.transactions += 1
+        return await write(self)
+
+
+def fake_db(session: FakeSession):
+    async def start_session():
+        return session
+    return SimpleNamespace(client=SimpleNamespace(start_session=start_session))
+
+
+def test_transaction_restarted_after_duplicate_key(monkeypatch):
+    monkeypatch.setattr(get_settings(), "MONGO_USE_TRANSACTIONS", True)
+    session = FakeSession()
+    failures = [DuplicateKeyError("E11000 duplicate key error")]
+
+    async def write(current):
+        assert current is session
+        if failures:
+            raise failures.pop()
+        return "written"
+
+    # TEST: A lost upsert race runs the whole transaction again instead of the aborted one
+    assert asyncio.run(_run_write(fake_db(session), write)) == "written"
+    assert session.transactions == 2
+
+    # TEST: A duplicate key that a new transaction does not resolve is a conflict
+    async def always_duplicate(current):
+        raise DuplicateKeyError("E11000 duplicate key error")
+
+    session = FakeSession()
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(_run_write(fake_db(session), always_duplicate))
+    assert exc_info.value.status_code == 409
+    assert session.transactions == 2
+
+
+def test_without_transactions(monkeypatch):
+    monkeypatch.setattr(get_settings(), "MONGO_USE_TRANSACTIONS", False)
+
+    async def write(session):
+        return session
+
+    # TEST: Writes get no session when transactions are off
+    assert asyncio.run(_run_write(SimpleNamespace(), write)) is None
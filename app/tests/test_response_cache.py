@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from bson import ObjectId
+from starlette.requests import Request
+
+from app.api.response_cache import ResponseCache
+from app.core.cache import MemoryCacheBackend
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def test_detail_fill_racing_an_update():
+    blog_id = ObjectId()
+    blog = {"title": "before"}
+
+    async def run():
+        cache = ResponseCache(MemoryCacheBackend(max_entries=100, max_bytes=1 << 20), ttl=60)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_build():
+            snapshot = dict(blog)
+            started.set()
+            await release.wait()
+            return snapshot
+
+        async def build():
+            return dict(blog)
+
+        async def unexpected_build():
+            raise AssertionError("served from the cache")
+
+        # a miss reads the blog, then the blog is updated before the build stores its payload
+        fill = asyncio.create_task(cache.respond(make_request(), await cache.detail_key(blog_id), slow_build))
+        await started.wait()
+        blog["title"] = "after"
+        await cache.invalidate_blog(blog_id)
+        release.set()
+        assert json.loads((await fill).body) == {"title": "before"}
+
+        # TEST: The stale payload is not served after the invalidation
+        response = await cache.respond(make_request(), await cache.detail_key(blog_id), build)
+        assert json.loads(response.body) == {"title": "after"}
+
+        # TEST: The rebuilt payload is cached until the next invalidation
+        response = await cache.respond(make_request(), await cache.detail_key(blog_id), unexpected_build)
+        assert json.loads(response.body) == {"title": "after"}
+
+    asyncio.run(run())
+
+
+def test_generations_bounded():
+    blog_ids = [ObjectId() for _ in range(3)]
+
+    async def run():
+        backend = MemoryCacheBackend(max_entries=2, max_bytes=1 << 20)
+        cache = ResponseCache(backend, ttl=60)
+        stale_key = await cache.detail_key(blog_ids[0])
+        await backend.set(stale_key, b'"etag"\n{"title": "stale"}', 60)
+        for blog_id in blog_ids:
+            await cache.invalidate_blog(blog_id)
+            await cache.invalidate_author(str(blog_id))
+
+        # TEST: Generation counters are capped like the entries
+        assert backend.stats()["counters"] == 2
+
+        # TEST: A dropped generation comes back above its old values
+        assert await cache.detail_key(blog_ids[0]) != stale_key
+        generation = int((await cache.detail_key(blog_ids[0])).rsplit(":", 1)[1])
+        assert generation > 1
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import os
+
+from app import server
+from app.config import get_settings
+
+
+def test_worker_count(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 6)
+
+    # TEST: SERVER_WORKERS=0 runs one worker per core, explicit counts are kept
+    assert server.worker_count(0) == 6
+    assert server.worker_count(3) == 3
+
+    # TEST: One worker when the core count is unknown
+    monkeypatch.setattr(os, "cpu_count", lambda: None)
+    assert server.worker_count(0) == 1
+
+
+def test_worker_pool_sizes(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "MONGO_MIN_POOL_SIZE", 10)
+
+    # TEST: Without a total each worker keeps its own pool settings
+    monkeypatch.setattr(settings, "MONGO_TOTAL_MAX_POOL_SIZE", 0)
+    assert server.worker_pool_sizes(4) == {}
+
+    # TEST: The total is split evenly, the remainder is left unused so the total is never exceeded
+    monkeypatch.setattr(settings, "MONGO_TOTAL_MAX_POOL_SIZE", 100)
+    assert server.worker_pool_sizes(4) == {"MONGO_MAX_POOL_SIZE": 25, "MONGO_MIN_POOL_SIZE": 10}
+    assert server.worker_pool_sizes(3) == {"MONGO_MAX_POOL_SIZE": 33, "MONGO_MIN_POOL_SIZE": 10}
+
+    # TEST: The minimum pool never exceeds the maximum
+    assert server.worker_pool_sizes(16) == {"MONGO_MAX_POOL_SIZE": 6, "MONGO_MIN_POOL_SIZE": 6}
+
+    # TEST: Every worker gets at least one connection
+    monkeypatch.setattr(settings, "MONGO_TOTAL_MAX_POOL_SIZE", 2)
+    assert server.worker_pool_sizes(4) == {"MONGO_MAX_POOL_SIZE": 1, "MONGO_MIN_POOL_SIZE": 1}
+
+    # TEST: One worker per core shares the total across the cores
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "MONGO_TOTAL_MAX_POOL_SIZE", 100)
+    assert server.worker_pool_sizes(server.worker_count(0))["MONGO_MAX_POOL_SIZE"] == 12
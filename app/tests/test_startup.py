@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+
+# the directory holding the app package
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# cumulative import time of app.main in a fresh interpreter, override with STARTUP_IMPORT_BUDGET_MS on slow machines
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 1500))
+# loaded on first use or by the server supervisor, never by importing the app
+DEFERRED_MODULES = ("passlib", "uvicorn")
+
+
+def _import_times(module: str) -> dict:
+    """
+    Cumulative import time in milliseconds per module, from `python -X importtime`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def test_import_budget():
+    times = _import_times("app.main")
+
+    # TEST: heavy modules stay out of the import path
+    assert not [name for name in DEFERRED_MODULES if name in times]
+
+    # TEST: the app imports within the startup budget
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:10]
+    assert times["app.main"] <= IMPORT_BUDGET_MS, slowest
+
+
+def test_import_without_settings(tmp_path):
+    # app/.env is looked up relative to the working directory, tmp_path has none
+    env = {name: value for name, value in os.environ.items() if not name.startswith("MONGO_")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main, app.config; print(app.config.get_settings.cache_info().misses)"],
+        capture_output=True, text=True, cwd=tmp_path, env=env,
+    )
+
+    # TEST: importing the app neither reads nor requires the settings
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "0"
@@ -0,0 +1,45 @@
+"""
+Ingest throughput against the Mongo configured in app/.env: blogs posted one at
+a time through POST /blogs/ versus batches through POST /blogs/bulk.
+
+    python -m benchmarks.bench_bulk_ingest [documents] [batch_size]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from app.auth.auth_handler import sign_jwt
+from app.config import get_settings
+from app.main import app
+
+
+async def main(documents: int = 5000, batch_size: int = 500):
+    blogs = [{"title": f"bulk {i}", "content": "bulk ingest content " * 20} for i in range(documents)]
+    headers = {"Authorization": "Bearer " + sign_jwt("ingest@bench", "bench-ingest", "0" * 24)["access_token"]}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            for blog in blogs:
+                await client.post("/blogs/", json=blog, headers=headers)
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for offset in range(0, documents, batch_size):
+                r = await client.post("/blogs/bulk", json=blogs[offset:offset + batch_size], headers=headers)
+                assert r.json()["failed"] == 0
+            bulk = time.perf_counter() - started
+
+        await app.state.mongo_client[get_settings().MONGO_DB].blogs.delete_many({"created_by": "bench-ingest"})
+
+    print(f"one by one:           {documents / single:9.0f} docs/s")
+    print(f"bulk ({batch_size:>4} per call): {documents / bulk:9.0f} docs/s  x{single / bulk:.1f}")
+
+
+if __name__ == "__main__":
+    # throughput is measured here, not the bulk rate limit
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,68 @@
+"""
+Bytes read from Mongo and Python CPU for one listing page of synthetic blogs.
+
+"before" is a find() excluding `content` followed by the ObjectId copy loop,
+"after" is the aggregation output of _listing_projection (string ids and the
+stored excerpt) encoded as is, and "fields" is the same with `fields=title`.
+
+    python -m benchmarks.bench_listing_payload [per_page] [content_bytes]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import bson
+from bson import ObjectId
+
+from app.api.responses import dumps
+from app.models.blogs import make_excerpt
+
+
+def _documents(per_page: int, content_bytes: int):
+    now = datetime.now()
+    content = ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes]
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Blog title number {i}",
+            "content": content,
+            "excerpt": make_excerpt(content),
+            "likes": i,
+            "dislikes": i // 2,
+            "comments": i // 3,
+            "created_at": now - timedelta(minutes=i),
+            "created_by": f"author{i % 7}",
+        }
+        for i in range(per_page)
+    ]
+
+
+def main(per_page: int = 100, content_bytes: int = 20000, iterations: int = 500):
+    documents = _documents(per_page, content_bytes)
+    before_docs = [{k: v for k, v in doc.items() if k != "content"} for doc in documents]
+    after_docs = [
+        {"_id": str(doc["_id"]), **{k: v for k, v in doc.items() if k not in ("_id", "content")}}
+        for doc in documents
+    ]
+    fields_docs = [{"_id": doc["_id"], "created_at": doc["created_at"], "title": doc["title"]} for doc in after_docs]
+
+    def before():
+        page = [dict(doc) for doc in before_docs]
+        for doc in page:
+            doc["_id"] = str(doc["_id"])
+        return dumps(page)
+
+    def after():
+        return dumps(after_docs)
+
+    print(f"full documents:        {sum(len(bson.encode(d)) for d in documents):>10} bytes")
+    print(f"before (no content):   {sum(len(bson.encode(d)) for d in before_docs):>10} bytes")
+    print(f"after (projected):     {sum(len(bson.encode(d)) for d in after_docs):>10} bytes")
+    print(f"fields=title:          {sum(len(bson.encode(d)) for d in fields_docs):>10} bytes")
+    for name, func in (("before", before), ("after", after), ("fields", lambda: dumps(fields_docs))):
+        per_page_us = timeit.timeit(func, number=iterations) / iterations * 1e6
+        print(f"{name:<7} python cpu {per_page_us:9.1f} us/page")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
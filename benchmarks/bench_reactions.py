@@ -0,0 +1,73 @@
+"""
+Load benchmark of the reaction routes against the Mongo configured in app/.env.
+
+Many users like, switch to dislike and undo reactions on a single blog
+concurrently, some of them double-clicking. Afterwards the blog counters
+are compared with the user_reactions collection to detect drift.
+
+    python -m benchmarks.bench_reactions [users] [concurrency]
+"""
+import asyncio
+import random
+import sys
+import time
+
+import httpx
+from bson import ObjectId
+
+from app.auth.auth_handler import sign_jwt
+from app.config import get_settings
+from app.main import app
+
+
+async def main(users: int = 500, concurrency: int = 50):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            owner = {"Authorization": "Bearer " + sign_jwt("owner@bench", "owner", str(ObjectId()))["access_token"]}
+            r = await client.post("/blogs/", json={"title": "bench", "content": "bench"}, headers=owner)
+            blog_id = r.json()["_id"]
+
+            semaphore = asyncio.Semaphore(concurrency)
+            requests = 0
+
+            async def call(method, url, headers):
+                nonlocal requests
+                async with semaphore:
+                    await client.request(method, url, headers=headers)
+                    requests += 1
+
+            async def user_session(i):
+                headers = {"Authorization": "Bearer " + sign_jwt(f"user{i}@bench", f"user{i}", str(ObjectId()))["access_token"]}
+                # double click on like
+                await asyncio.gather(
+                    call("POST", f"/blogs/{blog_id}/likes", headers),
+                    call("POST", f"/blogs/{blog_id}/likes", headers),
+                )
+                if random.random() < 0.5:
+                    await call("POST", f"/blogs/{blog_id}/dislikes", headers)
+                if random.random() < 0.3:
+                    await call("DELETE", f"/blogs/{blog_id}/likes", headers)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(user_session(i) for i in range(users)))
+            elapsed = time.perf_counter() - started
+
+            blog = (await client.get(f"/blogs/{blog_id}")).json()
+            mongo_db = app.state.mongo_client[get_settings().MONGO_DB]
+            expected = {
+                reaction_type: await mongo_db.user_reactions.count_documents(
+                    {"blog_id": ObjectId(blog_id), "reaction_type": reaction_type}
+                )
+                for reaction_type in ("likes", "dislikes")
+            }
+            await client.delete(f"/blogs/{blog_id}", headers=owner)
+
+    print(f"{requests} reaction requests in {elapsed:.2f}s, {requests / elapsed:.0f} req/s")
+    drift = {name: blog[name] - expected[name] for name in expected}
+    print(f"counters {dict((name, blog[name]) for name in expected)}, reactions {expected}, drift {drift}")
+    return 0 if not any(drift.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(*(int(arg) for arg in sys.argv[1:]))))
@@ -0,0 +1,400 @@
+"""
+Throughput and tail latency of every route in app/api/routes/blogs.py and
+app/api/routes/users.py.
+
+Seeds users, blogs, comments and reactions, then drives each route with
+concurrent requests through the ASGI app, without a network in between, and
+reports p50/p95/p99 latency, requests per second and Mongo operations per
+request.
+
+Runs against the Mongo configured in app/.env, whose database is dropped before
+and after the run so its name must start with "bench" or "test". With --mock it
+runs against an in-memory mongomock-motor stand-in instead (pip install
+mongomock-motor). The stand-in has no $text support, so search is skipped, and
+its latencies say little about a real server while its operation counts do.
+
+    python -m benchmarks.bench_routes [--mock] [--requests 500] [--concurrency 50] [--only blogs.list,...]
+    python -m benchmarks.bench_routes --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_routes --baseline benchmarks/baseline.json [--tolerance 0.25]
+
+A baseline is only comparable with runs on the same machine and backend. With
+--baseline the run exits with 1 when a route's p95 or req/s is worse than the
+baseline by more than the tolerance, or when it issues more Mongo operations
+per request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+
+import httpx
+from bson import ObjectId
+from pymongo import monitoring
+
+
+class Scenario(NamedTuple):
+    name: str
+    # (context, request number) -> (method, url, keyword arguments of httpx request)
+    build: Callable
+    # fraction of --requests, password hashing routes are expensive by design
+    share: float = 1.0
+    real_mongo_only: bool = False
+
+
+class OperationCounter(monitoring.CommandListener):
+    """
+    Commands sent to the server, handshakes and heartbeats left out.
+    """
+
+    IGNORED = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildInfo"}
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name not in self.IGNORED:
+            with self._lock:
+                self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _count_mock_operations(counter: OperationCounter):
+    """
+    mongomock sends no commands, count the outermost calls of its collection methods instead.
+    """
+    from mongomock.collection import Collection
+
+    depth = threading.local()
+
+    def wrap(method):
+        def wrapper(*args, **kwargs):
+            if getattr(depth, "value", 0) == 0:
+                counter.count += 1
+            depth.value = getattr(depth, "value", 0) + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth.value -= 1
+        return wrapper
+
+    for name in (
+        "find", "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+        "delete_one", "delete_many", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+        "aggregate", "count_documents", "estimated_document_count", "bulk_write", "distinct",
+    ):
+        setattr(Collection, name, wrap(getattr(Collection, name)))
+
+
+def _auth(context, i: int) -> dict:
+    return {"Authorization": "Bearer " + context["tokens"][i % len(context["tokens"])]}
+
+
+def _own_blog(context, i: int):
+    """
+    A blog of the user whose token `_auth` picks for request `i`.
+    """
+    user = i % len(context["tokens"])
+    blogs = context["blogs_by_user"][user]
+    return blogs[(i // len(context["tokens"])) % len(blogs)]
+
+
+def _deletable(context, key: str, i: int):
+    user = i % len(context["tokens"])
+    return context[key][user].pop()
+
+
+SCENARIOS = [
+    Scenario("users.signup", lambda c, i: (
+        "POST", "/users/user/signup",
+        {"json": {"name": f"new user {i}", "email": f"new{i}-{c['run']}@bench.example", "password": "password"}},
+    ), share=0.1),
+    Scenario("users.login", lambda c, i: (
+        "POST", "/users/user/login",
+        {"json": {"email": f"user{i % c['users']}@bench.example", "password": "password"}},
+    ), share=0.1),
+    Scenario("users.author_blogs", lambda c, i: (
+        "GET", f"/users/{c['user_ids'][i % c['users']]}/blogs", {},
+    )),
+    Scenario("blogs.list", lambda c, i: ("GET", "/blogs/", {})),
+    Scenario("blogs.list_page_5", lambda c, i: ("GET", "/blogs/", {"params": {"page": 5}})),
+    Scenario("blogs.list_by_cursor", lambda c, i: ("GET", "/blogs/", {"params": {"cursor": c["cursor"]}})),
+    Scenario("blogs.search", lambda c, i: (
+        "GET", "/blogs/search", {"params": {"q": random.choice(c["words"])}},
+    ), real_mongo_only=True),
+    Scenario("blogs.trending", lambda c, i: ("GET", "/blogs/trending", {})),
+    Scenario("blogs.detail", lambda c, i: ("GET", f"/blogs/{random.choice(c['blog_ids'])}", {})),
+    Scenario("blogs.detail_fields", lambda c, i: (
+        "GET", f"/blogs/{random.choice(c['blog_ids'])}", {"params": {"fields": "title,likes"}},
+    )),
+    Scenario("blogs.comments", lambda c, i: ("GET", f"/blogs/{random.choice(c['blog_ids'])}/comments", {})),
+    Scenario("blogs.create", lambda c, i: (
+        "POST", "/blogs/", {"json": {"title": f"new blog {i}", "content": "bench content " * 50}, "headers": _auth(c, i)},
+    )),
+    Scenario("blogs.update", lambda c, i: (
+        "PUT", f"/blogs/{_own_blog(c, i)}",
+        {"json": {"title": f"updated {i}", "content": "updated content " * 50}, "headers": _auth(c, i)},
+    )),
+    Scenario("blogs.add_comment", lambda c, i: (
+        "POST", f"/blogs/{random.choice(c['blog_ids'])}/comments",
+        {"json": {"comment": f"bench comment {i}"}, "headers": _auth(c, i)},
+    )),
+    Scenario("blogs.update_comment", lambda c, i: (
+        "PUT", "/blogs/{}/comments/{}".format(*c["comments_by_user"][i % c["users"]][0]),
+        {"json": {"comment": f"updated comment {i}"}, "headers": _auth(c, i)},
+    )),
+    Scenario("blogs.delete_comment", lambda c, i: (
+        "DELETE", "/blogs/{}/comments/{}".format(*_deletable(c, "comments_by_user", i)), {"headers": _auth(c, i)},
+    )),
+    Scenario("blogs.undo_reaction", lambda c, i: (
+        "DELETE", "/blogs/{}/{}".format(*_deletable(c, "reactions_by_user", i)), {"headers": _auth(c, i)},
+    )),
+    # consecutive requests of a user like, then switch to dislike, on blogs from the end of the
+    # listing, which have no seeded reactions unless every (blog, user) pair was seeded
+    Scenario("blogs.reaction", lambda c, i: (
+        "POST", f"/blogs/{c['blog_ids'][-1 - (i // c['users']) // 2 % len(c['blog_ids'])]}/"
+                + ("likes" if (i // c["users"]) % 2 == 0 else "dislikes"),
+        {"headers": _auth(c, i)},
+    )),
+    Scenario("blogs.delete", lambda c, i: (
+        "DELETE", f"/blogs/{_deletable(c, 'blogs_by_user', i)}", {"headers": _auth(c, i)},
+    )),
+]
+
+
+async def _seed(mongo_db, users: int, blogs: int, comments: int, reactions: int) -> dict:
+    """
+    Insert the documents every scenario works on, returns what the scenarios need to know about them.
+    """
+    from app.auth.auth_handler import sign_jwt
+    from app.auth.hashing import hash_password
+    from app.models.blogs import make_excerpt
+
+    password = await hash_password("password")
+    user_docs = [
+        {"_id": ObjectId(), "name": f"user {u}", "email": f"user{u}@bench.example", "password": password}
+        for u in range(users)
+    ]
+    await mongo_db.users.insert_many(user_docs)
+
+    words = [f"topic{w}" for w in range(200)]
+    now = datetime.now()
+    blog_docs = []
+    for b in range(blogs):
+        author = user_docs[b % users]
+        content = " ".join(random.choices(words, k=200))
+        blog_docs.append({
+            "_id": ObjectId(),
+            "title": " ".join(random.choices(words, k=6)),
+            "content": content,
+            "excerpt": make_excerpt(content),
+            "likes": 0,
+            "dislikes": 0,
+            "comments": 0,
+            "created_at": now - timedelta(seconds=b),
+            "created_by": author["name"],
+            "author_id": str(author["_id"]),
+        })
+
+    comment_docs = []
+    for n in range(comments):
+        author, blog = user_docs[n % users], blog_docs[n % blogs]
+        blog["comments"] += 1
+        comment_docs.append({
+            "_id": ObjectId(),
+            "user_id": author["name"],
+            "author_id": str(author["_id"]),
+            "blog_id": blog["_id"],
+            "comment": f"seeded comment {n}",
+            "created_at": now - timedelta(seconds=n),
+        })
+
+    # distinct (blog, user) pairs
+    reaction_docs = []
+    for n in range(min(reactions, users * blogs)):
+        author, blog = user_docs[n % users], blog_docs[n // users]
+        reaction_type = "likes" if n % 3 else "dislikes"
+        blog[reaction_type] += 1
+        reaction_docs.append({
+            "blog_id": blog["_id"],
+            "author_id": str(author["_id"]),
+            "user_id": author["name"],
+            "reaction_type": reaction_type,
+        })
+
+    for collection, documents in (("blogs", blog_docs), ("comments", comment_docs), ("user_reactions", reaction_docs)):
+        for offset in range(0, len(documents), 10000):
+            await mongo_db[collection].insert_many(documents[offset:offset + 10000])
+
+    from app.api.pagination import encode_cursor
+    middle = blog_docs[len(blog_docs) // 2]
+    context = {
+        "users": users,
+        "run": ObjectId(),
+        "user_ids": [str(user["_id"]) for user in user_docs],
+        "tokens": [sign_jwt(user["email"], user["name"], str(user["_id"]))["access_token"] for user in user_docs],
+        "blog_ids": [str(blog["_id"]) for blog in blog_docs],
+        "cursor": encode_cursor(middle["created_at"], middle["_id"]),
+        "words": words,
+        "blogs_by_user": [[] for _ in range(users)],
+        "comments_by_user": [[] for _ in range(users)],
+        "reactions_by_user": [[] for _ in range(users)],
+    }
+    for b, blog in enumerate(blog_docs):
+        context["blogs_by_user"][b % users].append(str(blog["_id"]))
+    for n, comment in enumerate(comment_docs):
+        context["comments_by_user"][n % users].append((str(comment["blog_id"]), str(comment["_id"])))
+    for n, reaction in enumerate(reaction_docs):
+        context["reactions_by_user"][n % users].append((str(reaction["blog_id"]), reaction["reaction_type"]))
+    return context
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def _drive(client, scenario: Scenario, context, requests: int, concurrency: int, counter) -> dict:
+    numbers = iter(range(requests))
+    latencies, statuses = [], {}
+
+    async def worker():
+        for i in numbers:
+            try:
+                method, url, kwargs = scenario.build(context, i)
+            except IndexError:
+                # ran out of seeded documents to update or delete
+                break
+            started = time.perf_counter()
+            r = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    operations = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    operations = counter.count - operations
+    latencies.sort()
+    done = len(latencies)
+    return {
+        "requests": done,
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "rps": round(done / elapsed, 1),
+        "mongo_ops_per_request": round(operations / done, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            found.append(f"{name}: {before['rps']} -> {result['rps']} req/s")
+        if result["mongo_ops_per_request"] > before["mongo_ops_per_request"] + 0.05:
+            found.append(
+                f"{name}: {before['mongo_ops_per_request']} -> {result['mongo_ops_per_request']} mongo ops/request"
+            )
+    return found
+
+
+async def main(args) -> int:
+    from app.config import get_settings
+    import app.main as main_module
+    from app.main import app
+
+    settings = get_settings()
+    counter = OperationCounter()
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+
+        mock_client = AsyncMongoMockClient()
+        main_module.create_mongo_client = lambda *_args, **_kwargs: mock_client
+        _count_mock_operations(counter)
+    else:
+        if not settings.MONGO_DB.startswith(("bench", "test")):
+            print(f"refusing to drop {settings.MONGO_DB!r}, point MONGO_DB at a bench* or test* database", file=sys.stderr)
+            return 2
+        monitoring.register(counter)
+
+    only = set(args.only.split(",")) if args.only else None
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if (only is None or scenario.name in only) and not (args.mock and scenario.real_mongo_only)
+    ]
+    results = {}
+    async with app.router.lifespan_context(app):
+        mongo_db = app.state.mongo_client[settings.MONGO_DB]
+        await app.state.mongo_client.drop_database(settings.MONGO_DB)
+        from app.db.indexes import ensure_indexes
+        await ensure_indexes(mongo_db)
+        context = await _seed(mongo_db, args.users, args.blogs, args.comments, args.reactions)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'route':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'ops/req':>9}  statuses")
+            for scenario in scenarios:
+                requests = max(1, int(args.requests * scenario.share))
+                result = await _drive(client, scenario, context, requests, args.concurrency, counter)
+                results[scenario.name] = result
+                print(
+                    f"{scenario.name:<24}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                    f"{result['rps']:>9.0f}{result['mongo_ops_per_request']:>9.2f}  {result['statuses']}"
+                )
+        await app.state.mongo_client.drop_database(settings.MONGO_DB)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = _regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_routes")
+    parser.add_argument("--mock", action="store_true", help="use an in-memory mongomock-motor stand-in")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--blogs", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--reactions", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--only", help="comma separated route names")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the write rate limits on")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args(sys.argv[1:])
+    # settings are read when the app is imported, which main() does
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+    if args.mock:
+        for name, value in (("MONGO_DB", "bench"), ("MONGO_IP", "localhost"), ("MONGO_PORT", "27017"),
+                            ("MONGO_USER", ""), ("MONGO_PWD", "")):
+            os.environ.setdefault(name, value)
+    sys.exit(asyncio.run(main(args)))
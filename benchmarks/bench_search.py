@@ -0,0 +1,94 @@
+"""
+Latency envelope of GET /blogs/search on a synthetic corpus, against the Mongo
+configured in app/.env (point MONGO_DB at a scratch database).
+
+Seeds `posts` blogs built from a Zipf-like vocabulary, builds the indexes and
+times rare, common and multi-term queries through the app.
+
+    python -m benchmarks.bench_search [posts] [queries_per_term] [--keep]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.config import get_settings
+from app.db.indexes import ensure_indexes
+from app.main import app
+from app.models.blogs import make_excerpt
+
+
+VOCABULARY = [f"word{i}" for i in range(20000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+AUTHOR = "bench-search"
+
+
+def _text(words: int) -> str:
+    return " ".join(random.choices(VOCABULARY, weights=WEIGHTS, k=words))
+
+
+async def _seed(blogs, posts: int, batch_size: int = 10000):
+    now = datetime.now()
+    for offset in range(0, posts, batch_size):
+        documents = []
+        for i in range(offset, min(posts, offset + batch_size)):
+            content = _text(150)
+            documents.append({
+                "title": _text(6),
+                "content": content,
+                "excerpt": make_excerpt(content),
+                "likes": 0,
+                "dislikes": 0,
+                "comments": 0,
+                "created_at": now - timedelta(seconds=i),
+                "created_by": AUTHOR,
+            })
+        await blogs.insert_many(documents, ordered=False)
+
+
+def _percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def main(posts: int = 1_000_000, queries_per_term: int = 20, keep: bool = False):
+    async with app.router.lifespan_context(app):
+        mongo_db = app.state.mongo_client[get_settings().MONGO_DB]
+        if await mongo_db.blogs.count_documents({"created_by": AUTHOR}) < posts:
+            started = time.perf_counter()
+            await _seed(mongo_db.blogs, posts)
+            await ensure_indexes(mongo_db)
+            print(f"seeded {posts} posts in {time.perf_counter() - started:.0f}s")
+
+        queries = {
+            "common": "word1",
+            "mid": "word50",
+            "rare": "word15000",
+            "two terms": "word3 word400",
+            "phrase": '"word1 word2"',
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, q in queries.items():
+                samples = []
+                for _ in range(queries_per_term):
+                    started = time.perf_counter()
+                    r = await client.get("/blogs/search", params={"q": q, "per_page": 20})
+                    samples.append((time.perf_counter() - started) * 1000)
+                    assert r.status_code == 200
+                print(
+                    f"{name:<10} p50 {statistics.median(samples):8.1f}ms  "
+                    f"p95 {_percentile(samples, 0.95):8.1f}ms  p99 {_percentile(samples, 0.99):8.1f}ms"
+                )
+
+        if not keep:
+            await mongo_db.blogs.delete_many({"created_by": AUTHOR})
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--keep"]
+    asyncio.run(main(*(int(arg) for arg in args), keep="--keep" in sys.argv))
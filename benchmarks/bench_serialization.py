@@ -0,0 +1,67 @@
+"""
+Serialization cost of a blog listing page at per_page=100.
+
+"before" is the previous path: copying ObjectIds to strings in a Python loop,
+then jsonable_encoder and the stdlib json encoder. "after" hands the Mongo
+documents straight to orjson through app.api.responses.dumps.
+
+    python -m benchmarks.bench_serialization [iterations]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import dumps
+
+
+def _page(per_page: int = 100) -> dict:
+    now = datetime.now()
+    blogs = [
+        {
+            "_id": ObjectId(),
+            "title": f"Blog title number {i}",
+            "likes": i,
+            "dislikes": i // 2,
+            "comments": i // 3,
+            "created_at": now - timedelta(minutes=i),
+            "created_by": f"author{i % 7}",
+        }
+        for i in range(per_page)
+    ]
+    return {
+        "data": blogs,
+        "pagination": {"page": 1, "per_page": per_page, "total_pages": 10, "total_count": 1000, "next_cursor": "x"},
+    }
+
+
+def before(page: dict) -> bytes:
+    data = []
+    for doc in page["data"]:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        data.append(doc)
+    return json.dumps(jsonable_encoder({**page, "data": data})).encode()
+
+
+def after(page: dict) -> bytes:
+    return dumps(page)
+
+
+def main(iterations: int = 2000):
+    page = _page()
+    assert json.loads(before(page)) == json.loads(after(page))
+    results = {
+        "before": timeit.timeit(lambda: before(page), number=iterations),
+        "after": timeit.timeit(lambda: after(page), number=iterations),
+    }
+    for name, total in results.items():
+        per_page_us = total / iterations * 1e6
+        print(f"{name:<7} {per_page_us:9.1f} us/page  x{results['before'] / total:6.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,43 @@
+"""
+Concurrent identical GET /blogs/{blog_id} requests against the Mongo configured
+in app/.env, with the response cache emptied before every burst so each burst
+starts cold. Reports how many of them shared another request's Mongo query.
+
+    python -m benchmarks.bench_single_flight [concurrency] [bursts]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+from app.api.response_cache import get_response_cache
+from app.auth.auth_handler import sign_jwt
+from app.main import app
+
+
+async def main(concurrency: int = 1000, bursts: int = 10):
+    headers = {"Authorization": "Bearer " + sign_jwt("flight@bench", "bench-flight", "0" * 24)["access_token"]}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            r = await client.post("/blogs/", json={"title": "hot", "content": "hot post " * 200}, headers=headers)
+            blog_id = r.json()["_id"]
+            flights = get_response_cache().flights
+            calls, coalesced = flights.calls, flights.coalesced
+            started = time.perf_counter()
+            for _ in range(bursts):
+                await get_response_cache().backend.clear()
+                responses = await asyncio.gather(*(client.get(f"/blogs/{blog_id}") for _ in range(concurrency)))
+                assert all(response.status_code == 200 for response in responses)
+            elapsed = time.perf_counter() - started
+            await client.delete(f"/blogs/{blog_id}", headers=headers)
+
+    requests = concurrency * bursts
+    print(f"requests:   {requests:>8}  ({requests / elapsed:.0f}/s)")
+    print(f"queries:    {flights.calls - calls:>8}")
+    print(f"coalesced:  {flights.coalesced - coalesced:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))